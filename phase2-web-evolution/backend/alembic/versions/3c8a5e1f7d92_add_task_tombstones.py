@@ -0,0 +1,35 @@
+"""add task tombstones
+
+Revision ID: 3c8a5e1f7d92
+Revises: 9b1d2c7e4a60
+Create Date: 2026-10-19 15:48:12.570391
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c8a5e1f7d92'
+down_revision: Union[str, Sequence[str], None] = '9b1d2c7e4a60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('p2_task_tombstones',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('task_id', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_p2_task_tombstones_deleted_at'), 'p2_task_tombstones', ['deleted_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_p2_task_tombstones_deleted_at'), table_name='p2_task_tombstones')
+    op.drop_table('p2_task_tombstones')
@@ -0,0 +1,35 @@
+"""add task stats summary
+
+Revision ID: 7e2f9a4b1c35
+Revises: 3c8a5e1f7d92
+Create Date: 2026-10-19 16:31:55.284017
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e2f9a4b1c35'
+down_revision: Union[str, Sequence[str], None] = '3c8a5e1f7d92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('p2_task_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(), nullable=False),
+    sa.Column('stale', sa.Boolean(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['p2_users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('p2_task_stats')
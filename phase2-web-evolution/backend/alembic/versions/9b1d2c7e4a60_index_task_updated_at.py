@@ -0,0 +1,28 @@
+"""index task updated_at
+
+Revision ID: 9b1d2c7e4a60
+Revises: f4e56a95fb62
+Create Date: 2026-10-19 15:02:41.106254
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b1d2c7e4a60'
+down_revision: Union[str, Sequence[str], None] = 'f4e56a95fb62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_p2_tasks_updated_at'), 'p2_tasks', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_p2_tasks_updated_at'), table_name='p2_tasks')
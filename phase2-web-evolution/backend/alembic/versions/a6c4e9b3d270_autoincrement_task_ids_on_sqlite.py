@@ -0,0 +1,48 @@
+"""autoincrement task ids on sqlite
+
+Revision ID: a6c4e9b3d270
+Revises: f3b7a6d2c915
+Create Date: 2026-10-20 10:14:52.630417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6c4e9b3d270'
+down_revision: Union[str, Sequence[str], None] = 'f3b7a6d2c915'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # SQLite only; Postgres sequences never hand out an id twice
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return
+    with op.batch_alter_table('p2_tasks', recreate='always', table_kwargs={'sqlite_autoincrement': True}):
+        pass
+    # Start after every id ever used, including tasks already archived
+    next_after = bind.execute(sa.text(
+        "SELECT max(coalesce((SELECT max(id) FROM p2_tasks), 0), coalesce((SELECT max(id) FROM p2_tasks_archive), 0))"
+    )).scalar()
+    op.execute("DELETE FROM sqlite_sequence WHERE name = 'p2_tasks'")
+    op.execute(sa.text("INSERT INTO sqlite_sequence (name, seq) VALUES ('p2_tasks', :seq)").bindparams(seq=next_after))
+    # Rebuilding the table dropped its full-text search triggers
+    from search import ensure_search_index
+    ensure_search_index(bind)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return
+    with op.batch_alter_table('p2_tasks', recreate='always', table_kwargs={'sqlite_autoincrement': False}):
+        pass
+    from search import ensure_search_index
+    ensure_search_index(bind)
@@ -0,0 +1,40 @@
+"""add task search index
+
+Revision ID: b5d0e8c3f217
+Revises: 7e2f9a4b1c35
+Create Date: 2026-10-19 17:12:08.931554
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5d0e8c3f217'
+down_revision: Union[str, Sequence[str], None] = '7e2f9a4b1c35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Postgres only; SQLite databases get an FTS5 table from init_db()
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute(
+        "ALTER TABLE p2_tasks ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+        ") STORED"
+    )
+    op.create_index('ix_p2_tasks_search_vector', 'p2_tasks', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('ix_p2_tasks_search_vector', table_name='p2_tasks', postgresql_using='gin')
+    op.drop_column('p2_tasks', 'search_vector')
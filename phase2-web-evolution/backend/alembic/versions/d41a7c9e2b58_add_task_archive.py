@@ -0,0 +1,50 @@
+"""add task archive
+
+Revision ID: d41a7c9e2b58
+Revises: b5d0e8c3f217
+Create Date: 2026-10-19 18:05:41.226913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41a7c9e2b58'
+down_revision: Union[str, Sequence[str], None] = 'b5d0e8c3f217'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('p2_tasks_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('title', sa.String(), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('priority', sa.String(), nullable=False),
+    sa.Column('due_date', sa.DateTime(), nullable=True),
+    sa.Column('created_by', sa.Integer(), nullable=False),
+    sa.Column('assigned_to', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('completed_at', sa.DateTime(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['assigned_to'], ['p2_users.id'], ),
+    sa.ForeignKeyConstraint(['created_by'], ['p2_users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_p2_tasks_archive_created_at'), 'p2_tasks_archive', ['created_at'], unique=False)
+    op.create_index(op.f('ix_p2_tasks_archive_created_by'), 'p2_tasks_archive', ['created_by'], unique=False)
+    op.create_index(op.f('ix_p2_tasks_completed_at'), 'p2_tasks', ['completed_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_p2_tasks_completed_at'), table_name='p2_tasks')
+    op.drop_index(op.f('ix_p2_tasks_archive_created_by'), table_name='p2_tasks_archive')
+    op.drop_index(op.f('ix_p2_tasks_archive_created_at'), table_name='p2_tasks_archive')
+    op.drop_table('p2_tasks_archive')
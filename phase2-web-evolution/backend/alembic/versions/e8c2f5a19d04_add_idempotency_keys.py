@@ -0,0 +1,42 @@
+"""add idempotency keys
+
+Revision ID: e8c2f5a19d04
+Revises: d41a7c9e2b58
+Create Date: 2026-10-19 18:47:20.118436
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8c2f5a19d04'
+down_revision: Union[str, Sequence[str], None] = 'd41a7c9e2b58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('p2_idempotency_keys',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('scope', sa.String(), nullable=False),
+    sa.Column('key', sa.String(), nullable=False),
+    sa.Column('fingerprint', sa.String(), nullable=False),
+    sa.Column('status_code', sa.Integer(), nullable=False),
+    sa.Column('response', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['p2_users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'scope', 'key', name='uq_p2_idempotency_keys_user_scope_key')
+    )
+    op.create_index(op.f('ix_p2_idempotency_keys_created_at'), 'p2_idempotency_keys', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_p2_idempotency_keys_created_at'), table_name='p2_idempotency_keys')
+    op.drop_table('p2_idempotency_keys')
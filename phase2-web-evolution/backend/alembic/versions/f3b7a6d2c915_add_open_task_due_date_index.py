@@ -0,0 +1,28 @@
+"""add open task due date index
+
+Revision ID: f3b7a6d2c915
+Revises: e8c2f5a19d04
+Create Date: 2026-10-19 19:32:08.514377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b7a6d2c915'
+down_revision: Union[str, Sequence[str], None] = 'e8c2f5a19d04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_p2_tasks_due_date_open', 'p2_tasks', ['due_date'], unique=False, postgresql_where=sa.text("status != 'completed'"), sqlite_where=sa.text("status != 'completed'"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_p2_tasks_due_date_open', table_name='p2_tasks', postgresql_where=sa.text("status != 'completed'"), sqlite_where=sa.text("status != 'completed'"))
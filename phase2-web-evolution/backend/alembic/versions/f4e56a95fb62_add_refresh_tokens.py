@@ -0,0 +1,43 @@
+"""add refresh tokens
+
+Revision ID: f4e56a95fb62
+Revises: cfe5e8fb5984
+Create Date: 2026-10-19 14:15:02.418337
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4e56a95fb62'
+down_revision: Union[str, Sequence[str], None] = 'cfe5e8fb5984'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('p2_refresh_tokens',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('jti', sa.String(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.Column('revoked_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['p2_users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_p2_refresh_tokens_jti'), 'p2_refresh_tokens', ['jti'], unique=True)
+    op.create_index(op.f('ix_p2_refresh_tokens_user_id'), 'p2_refresh_tokens', ['user_id'], unique=False)
+    op.create_index(op.f('ix_p2_refresh_tokens_expires_at'), 'p2_refresh_tokens', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_p2_refresh_tokens_expires_at'), table_name='p2_refresh_tokens')
+    op.drop_index(op.f('ix_p2_refresh_tokens_user_id'), table_name='p2_refresh_tokens')
+    op.drop_index(op.f('ix_p2_refresh_tokens_jti'), table_name='p2_refresh_tokens')
+    op.drop_table('p2_refresh_tokens')
@@ -4,8 +4,10 @@ import jwt
 from jwt import DecodeError, ExpiredSignatureError
 from datetime import datetime, timedelta
 from typing import Optional
+import hashlib
 import os
 from dotenv import load_dotenv
+from ttl_cache import TTLCache
 
 # Load environment variables
 load_dotenv()
@@ -14,14 +16,44 @@ load_dotenv()
 SECRET_KEY = os.getenv("BETTER_AUTH_SECRET", "p2_todo_secret_998877665544332211")
 ALGORITHM = "HS256"
 
+# Verified-token cache: bounded size, entries live until the token's exp
+# but never longer than JWT_CACHE_MAX_TTL seconds
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", "10000"))
+JWT_CACHE_MAX_TTL = float(os.getenv("JWT_CACHE_MAX_TTL", "300"))
+
 security = HTTPBearer()
 
+class TokenCache(TTLCache):
+    """
+    Verified token payloads keyed by SHA-256 of the token, so raw tokens are
+    never kept in memory as keys. Entries expire with the token.
+    """
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[dict]:
+        return super().get(self._key(token))
+
+    def put(self, token: str, payload: dict):
+        exp = payload.get("exp")
+        super().put(self._key(token), payload, exp if isinstance(exp, (int, float)) else None)
+
+token_cache = TokenCache(JWT_CACHE_SIZE, JWT_CACHE_MAX_TTL)
+
 def verify_token(token: str) -> dict:
     """
-    Verify JWT token and return decoded payload
+    Verify JWT token and return decoded payload. Successfully verified
+    payloads are cached, so treat the returned dict as read-only.
     """
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        token_cache.put(token, payload)
         return payload
     except ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token has expired")
@@ -30,6 +62,20 @@ def verify_token(token: str) -> dict:
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+def bearer_user_id(authorization: Optional[str]) -> Optional[str]:
+    """
+    User id from an Authorization header carrying a valid bearer token, or
+    None. For middleware that needs the caller without rejecting anonymous
+    requests; unverified claims aren't trusted.
+    """
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return verify_token(token).get("sub")
+    except HTTPException:
+        return None
+
 def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
     """
     Get current user from JWT token
@@ -0,0 +1,60 @@
+import asyncio
+from typing import Callable, List, Optional
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class PeriodicTask:
+    """
+    Run a blocking function every `interval` seconds on a worker thread for
+    the lifetime of the app. Failures are logged and retried on the next tick.
+    """
+
+    def __init__(self, name: str, interval: float, func: Callable[[], object]):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                result = await asyncio.to_thread(self.func)
+                logger.debug("Background job finished", extra={"job": self.name, "result": result})
+            except Exception:
+                logger.exception("Background job failed", extra={"job": self.name})
+
+    def start(self):
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run(), name=self.name)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Jobs registered by feature modules; main.py starts and stops them with the app
+jobs: List[PeriodicTask] = []
+
+
+def register_job(name: str, interval: float, func: Callable[[], object]) -> PeriodicTask:
+    job = PeriodicTask(name, interval, func)
+    jobs.append(job)
+    return job
+
+
+def start_jobs():
+    for job in jobs:
+        job.start()
+
+
+async def stop_jobs():
+    for job in jobs:
+        await job.stop()
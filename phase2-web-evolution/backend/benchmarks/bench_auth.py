@@ -0,0 +1,127 @@
+"""
+Login/register load test with and without the user cache
+
+Usage (from phase2-web-evolution/backend):
+    python benchmarks/bench_auth.py [--users 200] [--logins 2000] [--concurrency 16]
+
+Runs in-process through httpx's ASGI transport against a throwaway SQLite
+database (or BENCH_DATABASE_URL). SCRYPT_N defaults to 1024 here so the
+numbers reflect the database path rather than password hashing; export a
+larger value to include realistic hashing cost.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL") or f"sqlite:///{tempfile.mkdtemp()}/bench_auth.db"
+os.environ.setdefault("SCRYPT_N", "1024")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+# Every simulated client shares one address; measure the app, not the limiter
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+import httpx
+from sqlalchemy import event
+
+from db import engine, init_db
+from user_cache import user_cache
+
+PASSWORD = "correct horse battery staple"
+RUN_ID = time.time_ns()
+
+
+def _statement_counter():
+    counter = {"statements": 0}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        counter["statements"] += 1
+
+    return counter
+
+
+async def _drive(client, requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(path, body, expected):
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post(path, json=body)
+            latencies.append(time.perf_counter() - start)
+            assert response.status_code == expected, response.text
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(*request) for request in requests))
+    return time.perf_counter() - start, latencies
+
+
+def _report(name, elapsed, latencies, statements):
+    count = len(latencies)
+    p95 = statistics.quantiles(latencies, n=20)[18] if count > 1 else latencies[0]
+    print(f"{name:<26} {count / elapsed:>9.1f} {statistics.median(latencies) * 1000:>9.2f} "
+          f"{p95 * 1000:>9.2f} {statements / count:>11.2f}")
+
+
+async def run(client, counter, label, users, logins, concurrency):
+    emails = [f"bench_{RUN_ID}_{label}_{i}@example.com" for i in range(users)]
+
+    register = [
+        ("/api/v1/auth/register", {"email": email, "username": email.split("@")[0], "password": PASSWORD}, 200)
+        for email in emails
+    ]
+    before = counter["statements"]
+    elapsed, latencies = await _drive(client, register, concurrency)
+    _report(f"register ({label})", elapsed, latencies, counter["statements"] - before)
+
+    duplicates = [
+        ("/api/v1/auth/register", {"email": email, "username": email.split("@")[0], "password": PASSWORD}, 409)
+        for email in random.choices(emails, k=users)
+    ]
+    before = counter["statements"]
+    elapsed, latencies = await _drive(client, duplicates, concurrency)
+    _report(f"register dup ({label})", elapsed, latencies, counter["statements"] - before)
+
+    login = [
+        ("/api/v1/auth/login", {"email": email, "password": PASSWORD}, 200)
+        for email in random.choices(emails, k=logins)
+    ]
+    before = counter["statements"]
+    elapsed, latencies = await _drive(client, login, concurrency)
+    _report(f"login ({label})", elapsed, latencies, counter["statements"] - before)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--logins", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    init_db()
+    import main as app_module
+
+    counter = _statement_counter()
+    print(f"Database: {engine.url.render_as_string(hide_password=True)}, SCRYPT_N={os.environ['SCRYPT_N']}\n")
+    print(f"{'scenario':<26} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'stmts/req':>11}")
+
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        cache_size = user_cache.maxsize
+
+        user_cache.maxsize = 0
+        await run(client, counter, "no cache", args.users, args.logins, args.concurrency)
+
+        user_cache.maxsize = cache_size
+        await run(client, counter, "cache", args.users, args.logins, args.concurrency)
+
+    print(f"\nUser cache: {user_cache.stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,101 @@
+"""
+Bytes on the wire and latency for large task responses, per content encoding
+
+Usage (from phase2-web-evolution/backend):
+    python benchmarks/bench_compression.py [--tasks 500] [--repeat 50] [--link-kbps 1000]
+
+Runs in-process through httpx's ASGI transport against a throwaway SQLite
+database seeded with tasks. Transfer time is estimated for a link of the
+given bandwidth, which dominates for users on slow connections.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL") or f"sqlite:///{tempfile.mkdtemp()}/bench_compression.db"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+# Every simulated client shares one address; measure the app, not the limiter
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+import httpx
+
+from db import init_db
+import middleware
+
+ENDPOINTS = [
+    ("list, 50 tasks", "/api/v1/tasks/?limit=50"),
+    ("changes, full sync", "/api/v1/tasks/changes?limit=500"),
+]
+
+
+async def _seed(client, headers, count):
+    for start in range(0, count, 100):
+        tasks = [
+            {
+                "title": f"Task {i}",
+                "description": f"Follow up on item {i} with the team and update the tracker " * 2,
+                "priority": ("low", "medium", "high")[i % 3],
+            }
+            for i in range(start, min(start + 100, count))
+        ]
+        response = await client.post("/api/v1/tasks/batch", json={"tasks": tasks}, headers=headers)
+        assert response.status_code == 200, response.text
+
+
+async def _measure(client, path, headers, encoding, repeat):
+    latencies = []
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = await client.get(path, headers={**headers, "Accept-Encoding": encoding})
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.text
+        # Raw bytes as received, before httpx decodes them
+        size = response.num_bytes_downloaded
+        assert response.headers.get("content-encoding", "identity") == encoding
+    return size, statistics.median(latencies)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--link-kbps", type=float, default=1000, help="Link bandwidth for the transfer estimate")
+    args = parser.parse_args()
+
+    init_db()
+    import main as app_module
+
+    encodings = ["identity", "gzip"]
+    if middleware.brotli is not None:
+        encodings.append("br")
+
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        email = f"bench_{time.time_ns()}@example.com"
+        response = await client.post(
+            "/api/v1/auth/register",
+            json={"email": email, "username": email.split("@")[0], "password": "correct horse battery staple"}
+        )
+        headers = {"Authorization": f"Bearer {response.json()['tokens']['access_token']}"}
+        await _seed(client, headers, args.tasks)
+
+        print(f"{'endpoint':<20} {'encoding':<9} {'bytes':>9} {'ratio':>7} {'server ms':>10} "
+              f"{'wire ms @' + str(int(args.link_kbps)) + 'kbps':>18}")
+        for name, path in ENDPOINTS:
+            baseline = None
+            for encoding in encodings:
+                size, latency = await _measure(client, path, headers, encoding, args.repeat)
+                baseline = baseline or size
+                wire_ms = size * 8 / (args.link_kbps * 1000) * 1000
+                print(f"{name:<20} {encoding:<9} {size:>9} {baseline / size:>6.1f}x {latency * 1000:>10.2f} "
+                      f"{wire_ms:>18.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+"""
+Login throughput under concurrency, and event-loop stall from password hashing
+
+Usage (from phase2-web-evolution/backend):
+    python benchmarks/bench_login.py [--requests 64] [--concurrency 1 8 32]
+
+Drives POST /api/v1/auth/login in-process through httpx's ASGI transport
+against a throwaway SQLite database (or BENCH_DATABASE_URL), then compares
+how long the event loop is blocked when scrypt runs inline vs on the
+password pool. Cost parameters come from SCRYPT_N/SCRYPT_R/SCRYPT_P and
+pool size from PASSWORD_HASH_WORKERS, so set those to compare settings.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL") or f"sqlite:///{tempfile.mkdtemp()}/bench_login.db"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+# Every simulated client shares one address; measure the app, not the limiter
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+import httpx
+
+import passwords
+from db import init_db
+
+EMAIL = f"bench_login_{time.time_ns()}@example.com"
+PASSWORD = "correct horse battery staple"
+
+
+async def _heartbeat(stop: asyncio.Event, lags: list, interval: float = 0.005):
+    """Record how late each tick fires; large values mean the loop was blocked"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lags.append(max(loop.time() - expected, 0.0))
+
+
+async def bench_endpoint(client, total, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post("/api/v1/auth/login", json={"email": EMAIL, "password": PASSWORD})
+            latencies.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.text
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - start
+    return total / elapsed, latencies
+
+
+async def bench_loop_stall(total, inline):
+    stored = passwords.hash_password(PASSWORD)
+    stop = asyncio.Event()
+    lags = []
+    heartbeat = asyncio.create_task(_heartbeat(stop, lags))
+
+    async def inline_verify():
+        return passwords.verify_password(PASSWORD, stored)
+
+    verify = inline_verify if inline else (lambda: passwords.verify_password_async(PASSWORD, stored))
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(verify() for _ in range(total)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await heartbeat
+    assert all(results)
+    return total / elapsed, max(lags) if lags else 0.0
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args()
+
+    init_db()
+    import main as app_module
+
+    print(f"scrypt n={passwords.SCRYPT_N} r={passwords.SCRYPT_R} p={passwords.SCRYPT_P}, "
+          f"pool workers={passwords.PASSWORD_HASH_WORKERS}, cpus={os.cpu_count()}\n")
+
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.post("/api/v1/auth/register", json={
+            "email": EMAIL, "username": EMAIL.split("@")[0], "password": PASSWORD
+        })
+        assert response.status_code == 200, response.text
+
+        print(f"{'concurrency':>11} {'logins/s':>10} {'p50 ms':>9} {'p95 ms':>9}")
+        for concurrency in args.concurrency:
+            rate, latencies = await bench_endpoint(client, args.requests, concurrency)
+            p95 = statistics.quantiles(latencies, n=20)[18] if len(latencies) > 1 else latencies[0]
+            print(f"{concurrency:>11} {rate:>10.1f} {statistics.median(latencies) * 1000:>9.1f} {p95 * 1000:>9.1f}")
+
+    print(f"\n{'hashing':>11} {'verifies/s':>10} {'max loop stall ms':>18}")
+    for name, inline in (("inline", True), ("pool", False)):
+        rate, stall = await bench_loop_stall(args.requests, inline)
+        print(f"{name:>11} {rate:>10.1f} {stall * 1000:>18.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
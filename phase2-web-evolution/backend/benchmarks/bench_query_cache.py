@@ -0,0 +1,141 @@
+"""
+Per-request cost of the task list queries: statements rebuilt every request vs prebuilt by filter shape
+
+Usage (from phase2-web-evolution/backend):
+    python benchmarks/bench_query_cache.py [--tasks 200] [--repeat 2000]
+
+Seeds a throwaway SQLite database (or BENCH_DATABASE_URL) with a small
+table, so the time left is mostly Python: building the selects, deriving
+SQLAlchemy's compiled-cache key, and running the count and page queries.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL") or f"sqlite:///{tempfile.mkdtemp()}/bench_query_cache.db"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from sqlalchemy import func, insert, union_all
+from sqlmodel import Session, select, and_
+
+from db import engine, init_db
+from models import ArchivedTask, Task, User
+from search import apply_search, apply_archive_search, archive_search_patterns
+from serialization import TASK_FIELDS
+from task_queries import build_list_queries, list_queries
+
+CASES = [
+    # (label, fields, status, priority, q, include_archived)
+    ("unfiltered", TASK_FIELDS, None, None, None, False),
+    ("status + priority", TASK_FIELDS, "pending", "high", None, False),
+    ("search", TASK_FIELDS, None, None, "report", False),
+    ("archived + fields", ("id", "title", "status"), "completed", None, None, True),
+]
+
+
+def _seed(count):
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        user = User(email=f"bench_{time.time_ns()}@example.com", username=f"bench_{time.time_ns()}",
+                    password_hash="x")
+        session.add(user)
+        session.commit()
+        session.execute(insert(Task), [{
+            "title": f"Weekly report {i}" if i % 4 == 0 else f"Task {i}",
+            "description": "Some description text for the task",
+            "status": ("pending", "in_progress", "completed")[i % 3],
+            "priority": ("low", "medium", "high", "urgent")[i % 4],
+            "created_by": user.id,
+            "assigned_to": user.id,
+            "created_at": now - timedelta(minutes=i),
+            "updated_at": now - timedelta(minutes=i),
+        } for i in range(count)])
+        session.commit()
+
+
+def _conditions(model, status, priority):
+    conditions = []
+    if status:
+        conditions.append(model.status == status)
+    if priority:
+        conditions.append(model.priority == priority)
+    return conditions
+
+
+def rebuilt(session, dialect, fields, status, priority, q, include_archived):
+    """The list endpoint's queries as built before the cache: fresh selects with literal values"""
+    branch_fields = fields
+    if include_archived:
+        branch_fields += tuple(field for field in ("created_at", "updated_at") if field not in fields)
+    query = select(*(getattr(Task, field) for field in branch_fields))
+    conditions = _conditions(Task, status, priority)
+    if conditions:
+        query = query.where(and_(*conditions))
+    version_query = select(func.count(Task.id), func.max(Task.updated_at))
+    if conditions:
+        version_query = version_query.where(and_(*conditions))
+    if q:
+        version_query = apply_search(version_query, q, dialect, ranked=False)
+        query = apply_search(query, q, dialect, ranked=not include_archived)
+    if include_archived:
+        archived = select(*(getattr(ArchivedTask, field) for field in branch_fields))
+        archived_conditions = _conditions(ArchivedTask, status, priority)
+        if archived_conditions:
+            archived = archived.where(and_(*archived_conditions))
+        if q:
+            archived = apply_archive_search(archived, archive_search_patterns(q))
+        tasks = union_all(query, archived).subquery("tasks")
+        query = select(*(tasks.c[field] for field in fields))
+        version_query = select(func.count(), func.max(tasks.c.updated_at)).select_from(tasks)
+        created_at = tasks.c.created_at
+    else:
+        created_at = Task.created_at
+    session.exec(version_query).one()
+    return session.exec(query.offset(0).limit(10).order_by(created_at.desc())).all()
+
+
+def cached(session, dialect, fields, status, priority, q, include_archived):
+    """The endpoint's current path: statements looked up by shape, values bound per request"""
+    queries, params = list_queries(dialect, fields, status, priority, q, include_archived)
+    session.exec(queries.version, params=params).one()
+    return session.exec(queries.page, params={**params, "limit": 10, "offset": 0}).all()
+
+
+def _time(fn, session, case, repeat):
+    fn(session, engine.dialect.name, *case)  # Warm up, and fill both caches
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(session, engine.dialect.name, *case)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    init_db()
+    _seed(args.tasks)
+    print(f"Dialect: {engine.dialect.name}, tasks: {args.tasks}, repeats: {args.repeat}\n")
+    print(f"{'case':<20} {'rebuilt us':>11} {'cached us':>10} {'saved us':>9} {'speedup':>8}")
+
+    with Session(engine) as session:
+        for label, *case in CASES:
+            assert rebuilt(session, engine.dialect.name, *case) == cached(session, engine.dialect.name, *case)
+            before = statistics.median(_time(rebuilt, session, case, args.repeat)) * 1e6
+            after = statistics.median(_time(cached, session, case, args.repeat)) * 1e6
+            print(f"{label:<20} {before:11.1f} {after:10.1f} {before - after:9.1f} {before / after:7.1f}x")
+
+    print(f"\nStatement cache: {build_list_queries.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Task search latency: full-text index (tsvector/GIN or SQLite FTS5) vs a naive ILIKE scan
+
+Usage (from phase2-web-evolution/backend):
+    python benchmarks/bench_search.py [--tasks 1000000] [--repeat 20]
+
+Seeds a throwaway SQLite database (or BENCH_DATABASE_URL, e.g. a scratch
+Postgres) with synthetic tasks whose words follow a Zipf-like distribution,
+then times the list endpoint's query shape (one page of 10 plus the total
+count) for rare, common and multi-word searches.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL") or f"sqlite:///{tempfile.mkdtemp()}/bench_search.db"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from sqlalchemy import func, insert, or_
+from sqlmodel import Session, select
+
+from db import engine, init_db
+from models import Task, User
+from search import apply_search
+
+VOCABULARY = [f"term{i}" for i in range(5000)]
+WEIGHTS = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+
+SEARCHES = [
+    ("rare word", "term4000"),
+    ("common word", "term3"),
+    ("two words", "term10 term200"),
+]
+
+
+def _seed(count):
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        user = User(email=f"bench_{time.time_ns()}@example.com", username=f"bench_{time.time_ns()}",
+                    password_hash="x")
+        session.add(user)
+        session.commit()
+        for start in range(0, count, 10000):
+            rows = []
+            for i in range(start, min(start + 10000, count)):
+                words = rng.choices(VOCABULARY, WEIGHTS, k=12)
+                rows.append({
+                    "title": " ".join(words[:4]),
+                    "description": " ".join(words[4:]),
+                    "status": "pending",
+                    "priority": "medium",
+                    "created_by": user.id,
+                    "created_at": now - timedelta(seconds=i),
+                    "updated_at": now,
+                })
+            session.execute(insert(Task), rows)
+            session.commit()
+            print(f"\rSeeded {min(start + 10000, count)}/{count}", end="", flush=True)
+    print()
+
+
+def _ilike(query, q):
+    for word in q.split():
+        pattern = f"%{word}%"
+        query = query.where(or_(Task.title.ilike(pattern), Task.description.ilike(pattern)))
+    return query
+
+
+def _indexed(query, q, ranked):
+    return apply_search(query, q, engine.dialect.name, ranked=ranked)
+
+
+def _run(session, q, strategy):
+    if strategy == "index":
+        page = _indexed(select(Task.id, Task.title), q, ranked=True)
+        count = _indexed(select(func.count(Task.id)), q, ranked=False)
+    else:
+        page = _ilike(select(Task.id, Task.title), q)
+        count = _ilike(select(func.count(Task.id)), q)
+    rows = session.exec(page.order_by(Task.created_at.desc()).limit(10)).all()
+    total = session.exec(count).one()
+    return len(rows), total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    init_db()
+    _seed(args.tasks)
+
+    print(f"\n{engine.dialect.name}, {args.tasks} tasks")
+    print(f"{'search':<14} {'strategy':<9} {'matches':>9} {'p50 ms':>10} {'max ms':>10}")
+    with Session(engine) as session:
+        for name, q in SEARCHES:
+            for strategy in ("ilike", "index"):
+                timings = []
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    _, total = _run(session, q, strategy)
+                    timings.append(time.perf_counter() - start)
+                print(f"{name:<14} {strategy:<9} {total:>9} {statistics.median(timings) * 1000:>10.2f} "
+                      f"{max(timings) * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
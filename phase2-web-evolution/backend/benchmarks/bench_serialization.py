@@ -0,0 +1,119 @@
+"""
+Serialization cost per 1k tasks: pydantic models + response_model validation vs direct row encoding
+
+Usage (from phase2-web-evolution/backend):
+    python benchmarks/bench_serialization.py [--tasks 1000] [--repeat 200]
+
+No database is needed; rows are synthesized in the shape returned by
+select(*TASK_COLUMNS).
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# routes.tasks imports db, which builds an engine at import time; it is never connected here
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+import serialization
+from serialization import task_row_to_dict, dumps
+from routes.tasks import TaskResponse, TaskListResponse
+
+
+def _make_rows(count):
+    now = datetime.utcnow()
+    rows = []
+    for i in range(count):
+        rows.append((
+            i + 1,
+            f"Task {i}",
+            "Some description text for the task " * 3,
+            "completed" if i % 3 == 0 else "pending",
+            "medium",
+            now + timedelta(days=i % 30) if i % 2 else None,
+            1,
+            1,
+            now - timedelta(days=i),
+            now,
+            now if i % 3 == 0 else None,
+        ))
+    return rows
+
+
+def _pagination(count):
+    return {"total": count, "limit": count, "offset": 0, "has_more": False}
+
+
+def legacy_path(rows):
+    """Per-row TaskResponse with isoformat calls, then FastAPI-style response_model validation and encoding"""
+    task_responses = [
+        TaskResponse(
+            id=r[0], title=r[1], description=r[2], status=r[3], priority=r[4],
+            due_date=r[5].isoformat() if r[5] else None,
+            created_by=r[6], assigned_to=r[7],
+            created_at=r[8].isoformat(), updated_at=r[9].isoformat(),
+            completed_at=r[10].isoformat() if r[10] else None,
+        )
+        for r in rows
+    ]
+    response = TaskListResponse(tasks=task_responses, pagination=_pagination(len(rows)))
+    # What FastAPI does with a returned model when response_model is set
+    validated = _list_adapter.validate_python(response, from_attributes=True)
+    content = jsonable_encoder(validated)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast_path(rows):
+    """Direct row-to-dict mapping encoded by FastJSONResponse"""
+    return dumps({
+        "tasks": [task_row_to_dict(r) for r in rows],
+        "pagination": _pagination(len(rows)),
+    })
+
+
+_list_adapter = TypeAdapter(TaskListResponse)
+
+
+def _time(fn, rows, repeat):
+    fn(rows)  # Warm up
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(rows)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    rows = _make_rows(args.tasks)
+    encoder = "orjson" if serialization.orjson is not None else "json (stdlib fallback)"
+    print(f"Tasks per response: {args.tasks}, repeats: {args.repeat}, fast-path encoder: {encoder}\n")
+
+    results = {}
+    for name, fn in (("legacy", legacy_path), ("fast", fast_path)):
+        samples = _time(fn, rows, args.repeat)
+        results[name] = statistics.mean(samples)
+        print(f"{name:<8} mean {statistics.mean(samples) * 1000:8.3f} ms   "
+              f"p50 {statistics.median(samples) * 1000:8.3f} ms   "
+              f"bytes {len(fn(rows))}")
+
+    per_1k = 1000 / args.tasks
+    print(f"\nPer 1k tasks: legacy {results['legacy'] * 1000 * per_1k:.3f} ms, "
+          f"fast {results['fast'] * 1000 * per_1k:.3f} ms "
+          f"({results['legacy'] / results['fast']:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
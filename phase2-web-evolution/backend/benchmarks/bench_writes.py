@@ -0,0 +1,196 @@
+"""
+Write-path latency benchmark: commit + refresh vs single-statement RETURNING
+
+Usage (from phase2-web-evolution/backend):
+    python benchmarks/bench_writes.py [--iterations 500] [--url postgresql://...]
+
+Defaults to a throwaway SQLite file; pass --url (or set BENCH_DATABASE_URL)
+to run against a local Postgres. Tables are created if missing and the rows
+inserted by the benchmark are removed afterwards.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event, insert, update, delete, func
+from sqlmodel import Session, SQLModel, create_engine
+
+from models import Task, User
+
+
+def _make_engine(url):
+    engine = create_engine(url)
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def _count_statements(engine):
+    counter = {"statements": 0}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        counter["statements"] += 1
+
+    return counter
+
+
+def _task_values(user_id):
+    now = datetime.utcnow()
+    return {
+        "title": "Benchmark task",
+        "description": "Created by bench_writes.py",
+        "status": "pending",
+        "priority": "medium",
+        "created_by": user_id,
+        "assigned_to": user_id,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+# Previous implementation: ORM unit of work followed by a refresh SELECT
+def legacy_create(session, user_id):
+    task = Task(**_task_values(user_id))
+    session.add(task)
+    session.commit()
+    session.refresh(task)
+    return task.id
+
+
+def legacy_update(session, task_id):
+    task = session.get(Task, task_id)
+    task.title = "Updated"
+    task.updated_at = datetime.utcnow()
+    session.add(task)
+    session.commit()
+    session.refresh(task)
+
+
+def legacy_complete(session, task_id):
+    task = session.get(Task, task_id)
+    task.status = "completed"
+    task.completed_at = datetime.utcnow()
+    task.updated_at = datetime.utcnow()
+    session.add(task)
+    session.commit()
+    session.refresh(task)
+
+
+# Current implementation: one statement with RETURNING per write
+def returning_create(session, user_id):
+    task = session.scalars(insert(Task).values(**_task_values(user_id)).returning(Task)).one()
+    session.commit()
+    return task.id
+
+
+def returning_update(session, task_id):
+    session.scalars(
+        update(Task).where(Task.id == task_id)
+        .values(title="Updated", updated_at=datetime.utcnow())
+        .returning(Task)
+    ).one()
+    session.commit()
+
+
+def returning_complete(session, task_id):
+    now = datetime.utcnow()
+    session.scalars(
+        update(Task).where(Task.id == task_id)
+        .values(status="completed", completed_at=func.coalesce(Task.completed_at, now), updated_at=now)
+        .returning(Task)
+    ).one()
+    session.commit()
+
+
+def _run(engine, counter, user_id, iterations, create, update_fn, complete, expire_on_commit):
+    timings = {"create": [], "update": [], "complete": []}
+    statements = {"create": 0, "update": 0, "complete": 0}
+    task_ids = []
+
+    for _ in range(iterations):
+        with Session(engine, expire_on_commit=expire_on_commit) as session:
+            before = counter["statements"]
+            start = time.perf_counter()
+            task_id = create(session, user_id)
+            timings["create"].append(time.perf_counter() - start)
+            statements["create"] += counter["statements"] - before
+            task_ids.append(task_id)
+
+        with Session(engine, expire_on_commit=expire_on_commit) as session:
+            before = counter["statements"]
+            start = time.perf_counter()
+            update_fn(session, task_id)
+            timings["update"].append(time.perf_counter() - start)
+            statements["update"] += counter["statements"] - before
+
+        with Session(engine, expire_on_commit=expire_on_commit) as session:
+            before = counter["statements"]
+            start = time.perf_counter()
+            complete(session, task_id)
+            timings["complete"].append(time.perf_counter() - start)
+            statements["complete"] += counter["statements"] - before
+
+    with Session(engine) as session:
+        session.execute(delete(Task).where(Task.id.in_(task_ids)))
+        session.commit()
+
+    return {
+        op: {
+            "mean_ms": statistics.mean(values) * 1000,
+            "p50_ms": statistics.median(values) * 1000,
+            "p95_ms": statistics.quantiles(values, n=20)[18] * 1000,
+            "statements_per_op": statements[op] / iterations,
+        }
+        for op, values in timings.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--url", default=os.getenv("BENCH_DATABASE_URL"))
+    args = parser.parse_args()
+
+    url = args.url or f"sqlite:///{tempfile.mkdtemp()}/bench_writes.db"
+    engine = _make_engine(url)
+    counter = _count_statements(engine)
+
+    with Session(engine) as session:
+        user = User(
+            email=f"bench_{time.time_ns()}@example.com",
+            username=f"bench_{time.time_ns()}",
+            password_hash="bench",
+        )
+        session.add(user)
+        session.commit()
+        user_id = user.id
+
+    print(f"Database: {engine.url.render_as_string(hide_password=True)}")
+    print(f"Iterations: {args.iterations}\n")
+
+    legacy = _run(engine, counter, user_id, args.iterations,
+                  legacy_create, legacy_update, legacy_complete, expire_on_commit=True)
+    current = _run(engine, counter, user_id, args.iterations,
+                   returning_create, returning_update, returning_complete, expire_on_commit=False)
+
+    print(f"{'operation':<10} {'variant':<10} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'stmts/op':>9}")
+    for op in ("create", "update", "complete"):
+        for name, result in (("refresh", legacy[op]), ("returning", current[op])):
+            r = result
+            print(f"{op:<10} {name:<10} {r['mean_ms']:>9.3f} {r['p50_ms']:>9.3f} {r['p95_ms']:>9.3f} {r['statements_per_op']:>9.1f}")
+        saved = 1 - current[op]["mean_ms"] / legacy[op]["mean_ms"]
+        print(f"{'':<10} {'saved':<10} {saved:>9.1%}")
+
+    with Session(engine) as session:
+        session.execute(delete(User).where(User.id == user_id))
+        session.commit()
+
+
+if __name__ == "__main__":
+    main()
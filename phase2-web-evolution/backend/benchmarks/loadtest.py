@@ -0,0 +1,345 @@
+"""
+Load test for the task API: throughput and p50/p95/p99 latency per endpoint
+
+Usage (from phase2-web-evolution/backend):
+    python benchmarks/loadtest.py [--users 20] [--tasks 5000] [--concurrency 32] [--duration 30]
+                                  [--mix list=40,get=25,create=12,update=10,complete=8,delete=5]
+                                  [--url http://localhost:8000] [--output results.json]
+                                  [--baseline previous.json] [--max-regression 20]
+
+Seeds users and tasks straight into the database, mints access tokens with
+create_access_token (no login, so scrypt doesn't skew the numbers), then
+runs `--concurrency` simulated clients for `--duration` seconds, each
+picking endpoints at random by the weights in `--mix`.
+
+By default the app runs in-process through httpx's ASGI transport against a
+throwaway SQLite database. Set BENCH_DATABASE_URL to use a scratch Postgres
+instead. With `--url`, requests go to a running server; BENCH_DATABASE_URL
+must then point at that server's database, BETTER_AUTH_SECRET must match
+its signing secret, and the server should run with RATE_LIMIT_ENABLED=false
+or generous limits.
+
+Results are written as JSON. Passing an earlier file as `--baseline` prints
+the change per endpoint, and exits non-zero if any p95 grew or throughput
+fell by more than `--max-regression` percent.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL") or f"sqlite:///{tempfile.mkdtemp()}/loadtest.db"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+# Every simulated client shares one address; measure the app, not the limiter
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+import httpx
+from sqlalchemy import insert
+from sqlmodel import Session, select
+
+from auth_utils import create_access_token
+from db import engine, init_db
+from models import Task, User
+
+DEFAULT_MIX = "list=40,get=25,create=12,update=10,complete=8,delete=5"
+PRIORITIES = ("low", "medium", "high")
+PERCENTILES = (50, 95, 99)
+API = "/api/v1/tasks"
+
+
+def _parse_mix(mix: str) -> dict:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise SystemExit(f"Unknown endpoint {name!r} in --mix; choose from {', '.join(ENDPOINTS)}")
+        weights[name] = float(weight)
+    return weights
+
+
+def _seed(users: int, tasks: int) -> tuple:
+    """Insert users and tasks in bulk. Returns ([user ids], [task ids])"""
+    run = time.time_ns()
+    now = datetime.utcnow()
+    rng = random.Random(42)
+    with Session(engine) as session:
+        rows = [
+            {"email": f"load_{run}_{i}@example.com", "username": f"load_{run}_{i}", "password_hash": "x"}
+            for i in range(users)
+        ]
+        session.execute(insert(User), rows)
+        user_ids = list(session.exec(select(User.id).where(User.username.like(f"load_{run}_%"))))
+
+        for start in range(0, tasks, 10000):
+            rows = []
+            for i in range(start, min(start + 10000, tasks)):
+                owner = user_ids[i % len(user_ids)]
+                rows.append({
+                    "title": f"Task {i}",
+                    "description": f"Follow up on item {i} with the team and update the tracker",
+                    "status": "pending",
+                    "priority": PRIORITIES[i % 3],
+                    "due_date": now + timedelta(days=rng.randint(-10, 30)),
+                    "created_by": owner,
+                    "assigned_to": owner if i % 4 else None,
+                    "created_at": now - timedelta(seconds=tasks - i),
+                    "updated_at": now - timedelta(seconds=tasks - i),
+                })
+            session.execute(insert(Task), rows)
+        session.commit()
+        task_ids = list(session.exec(
+            select(Task.id).where(Task.created_by.in_(user_ids)).order_by(Task.id)
+        ))
+    return user_ids, task_ids
+
+
+def _token(user_id: int, run: str) -> str:
+    return create_access_token(
+        data={"sub": str(user_id), "email": f"load_{run}_{user_id}@example.com", "username": f"load_{run}_{user_id}"},
+        expires_delta=timedelta(hours=2)
+    )
+
+
+class Workload:
+    """
+    State shared by the simulated clients. Reads and updates target seeded
+    tasks, deletes only remove tasks created during the run, so no request
+    races another into a 404.
+    """
+
+    def __init__(self, task_ids: list, rng: random.Random):
+        self.task_ids = task_ids
+        self.created = []
+        self.rng = rng
+
+    def existing(self) -> int:
+        return self.rng.choice(self.task_ids)
+
+
+async def _list(client, headers, work):
+    params = {"limit": work.rng.choice((10, 20, 50)), "offset": work.rng.randrange(0, 200, 10)}
+    if work.rng.random() < 0.3:
+        params["status"] = "pending"
+    return await client.get(f"{API}/", params=params, headers=headers)
+
+
+async def _get(client, headers, work):
+    return await client.get(f"{API}/{work.existing()}", headers=headers)
+
+
+async def _create(client, headers, work):
+    response = await client.post(f"{API}/", json={
+        "title": f"Load task {work.rng.random():.6f}",
+        "description": "Created by the load test",
+        "priority": work.rng.choice(PRIORITIES),
+    }, headers=headers)
+    if response.status_code == 200:
+        work.created.append(response.json()["id"])
+    return response
+
+
+async def _update(client, headers, work):
+    return await client.put(f"{API}/{work.existing()}", json={
+        "title": f"Updated {work.rng.random():.6f}",
+        "priority": work.rng.choice(PRIORITIES),
+    }, headers=headers)
+
+
+async def _complete(client, headers, work):
+    return await client.patch(f"{API}/{work.existing()}/complete", headers=headers)
+
+
+async def _delete(client, headers, work):
+    if not work.created:
+        # Nothing created yet; skip rather than delete a seeded task
+        return None
+    task_id = work.created.pop(work.rng.randrange(len(work.created)))
+    return await client.delete(f"{API}/{task_id}", headers=headers)
+
+
+ENDPOINTS = {
+    "list": _list,
+    "get": _get,
+    "create": _create,
+    "update": _update,
+    "complete": _complete,
+    "delete": _delete,
+}
+
+
+async def _client_loop(client, tokens, work, weights, deadline, samples, errors, record):
+    names = list(weights)
+    while time.perf_counter() < deadline:
+        name = work.rng.choices(names, [weights[name] for name in names])[0]
+        headers = {"Authorization": f"Bearer {work.rng.choice(tokens)}"}
+        start = time.perf_counter()
+        try:
+            response = await ENDPOINTS[name](client, headers, work)
+        except httpx.HTTPError:
+            if record:
+                errors[name] += 1
+            continue
+        if response is None:
+            continue
+        elapsed = time.perf_counter() - start
+        if not record:
+            continue
+        if response.status_code >= 400:
+            errors[name] += 1
+        else:
+            samples[name].append(elapsed)
+
+
+def _percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _summarize(latencies: list, errors: int, elapsed: float) -> dict:
+    latencies = sorted(latencies)
+    summary = {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 2),
+    }
+    for pct in PERCENTILES:
+        summary[f"p{pct}_ms"] = round(_percentile(latencies, pct) * 1000, 3) if latencies else None
+    summary["max_ms"] = round(latencies[-1] * 1000, 3) if latencies else None
+    return summary
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _print_results(results: dict):
+    print(f"\n{'endpoint':<10} {'requests':>9} {'errors':>7} {'req/s':>9} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    rows = list(results["endpoints"].items()) + [("total", results["total"])]
+    for name, row in rows:
+        cells = [f"{row[key]:>9.2f}" if row[key] is not None else f"{'-':>9}"
+                 for key in ("p50_ms", "p95_ms", "p99_ms", "max_ms")]
+        print(f"{name:<10} {row['requests']:>9} {row['errors']:>7} {row['rps']:>9.1f} {' '.join(cells)}")
+
+
+def _compare(results: dict, baseline: dict, max_regression: float) -> bool:
+    """Print the change against a baseline run. False if anything regressed past the limit"""
+    print(f"\nAgainst baseline {baseline['meta'].get('git_revision') or '?'} "
+          f"({baseline['meta']['started_at']}):")
+    print(f"{'endpoint':<10} {'req/s':>9} {'change':>8} {'p95 ms':>9} {'change':>8}")
+    ok = True
+    current = dict(results["endpoints"], total=results["total"])
+    previous = dict(baseline["endpoints"], total=baseline["total"])
+    for name, row in current.items():
+        before = previous.get(name)
+        if not before or not before["rps"] or not before["p95_ms"] or row["p95_ms"] is None:
+            continue
+        rps_change = (row["rps"] - before["rps"]) / before["rps"] * 100
+        p95_change = (row["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100
+        flag = ""
+        if max_regression is not None and (rps_change < -max_regression or p95_change > max_regression):
+            flag = "  REGRESSION"
+            ok = False
+        print(f"{name:<10} {row['rps']:>9.1f} {rps_change:>+7.1f}% {row['p95_ms']:>9.2f} {p95_change:>+7.1f}%{flag}")
+    return ok
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--tasks", type=int, default=5000, help="Tasks seeded before the run")
+    parser.add_argument("--concurrency", type=int, default=32, help="Simulated clients")
+    parser.add_argument("--duration", type=float, default=30, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=3, help="Unmeasured seconds before the run")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Endpoint weights, name=weight,...")
+    parser.add_argument("--url", help="Drive a running server instead of the app in-process")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for the request sequence")
+    parser.add_argument("--output", default=f"loadtest-{datetime.utcnow():%Y%m%dT%H%M%S}.json")
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    parser.add_argument("--max-regression", type=float, help="Fail if p95 or req/s is this many percent worse")
+    args = parser.parse_args()
+
+    if args.url and not os.getenv("BENCH_DATABASE_URL"):
+        parser.error("--url needs BENCH_DATABASE_URL set to the server's database for seeding")
+    weights = _parse_mix(args.mix)
+
+    init_db()
+    print(f"Seeding {args.users} users and {args.tasks} tasks into {engine.dialect.name}...")
+    user_ids, task_ids = _seed(args.users, args.tasks)
+    if not task_ids:
+        parser.error("--tasks must be at least 1")
+    run = str(time.time_ns())
+    tokens = [_token(user_id, run) for user_id in user_ids]
+    work = Workload(task_ids, random.Random(args.seed))
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=30, limits=httpx.Limits(
+            max_connections=args.concurrency, max_keepalive_connections=args.concurrency
+        ))
+    else:
+        import main as app_module
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app_module.app), base_url="http://loadtest",
+                                   timeout=30)
+
+    samples = defaultdict(list)
+    errors = defaultdict(int)
+    started_at = datetime.utcnow()
+    async with client:
+        for phase, seconds, record in (("warmup", args.warmup, False), ("run", args.duration, True)):
+            if seconds <= 0:
+                continue
+            print(f"{phase}: {args.concurrency} clients for {seconds:g}s")
+            deadline = time.perf_counter() + seconds
+            start = time.perf_counter()
+            await asyncio.gather(*(
+                _client_loop(client, tokens, work, weights, deadline, samples, errors, record)
+                for _ in range(args.concurrency)
+            ))
+            elapsed = time.perf_counter() - start
+
+    results = {
+        "meta": {
+            "started_at": started_at.isoformat(),
+            "git_revision": _git_revision(),
+            "target": args.url or "in-process",
+            "database": engine.dialect.name,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        "endpoints": {name: _summarize(samples[name], errors[name], elapsed) for name in weights},
+        "total": _summarize([s for name in weights for s in samples[name]], sum(errors.values()), elapsed),
+    }
+    _print_results(results)
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nWrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if not _compare(results, baseline, args.max_regression):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
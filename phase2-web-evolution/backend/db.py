@@ -1,44 +1,178 @@
 from sqlmodel import create_engine, Session, SQLModel
 from sqlalchemy import event
-from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
 import os
 from dotenv import load_dotenv
 import logging
-from datetime import datetime
+import time
+from app_metrics import Histogram, Counter, REGISTRY, instrument_engine
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Database URL from environment
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# Pool configuration (defaults tuned for Neon's small free-tier connection limit)
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "2"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "8"))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "300"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+# Optional read replicas, comma separated. Read-only task endpoints use them
+# through read_replicas.get_read_session; everything else uses the primary.
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+
+# How setup_schema() brings the database up to date: "create_all" (init_db),
+# "migrate" (alembic upgrade head) or "none" when a deploy step handles it
+SCHEMA_SETUP = os.getenv("SCHEMA_SETUP", "create_all").lower()
+
+# Queries slower than this are logged; unset or 0 disables per-query timing entirely
+SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "0"))
+
+# Pool metrics
+checkout_latency = Histogram()
+checkout_wait = Histogram()
+checkout_timeouts = Counter()
+# Failures to open a new connection (refused, auth), kept apart from timeouts
+connect_errors = Counter()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that records how long each checkout takes and whether it had to wait
+    """
+
+    def _do_get(self):
+        # If every slot (including overflow) is taken, this checkout will block
+        exhausted = self.checkedout() >= self.size() + self._max_overflow
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            checkout_timeouts.inc()
+            raise
+        except Exception:
+            connect_errors.inc()
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            checkout_latency.observe(elapsed)
+            if exhausted:
+                checkout_wait.observe(elapsed)
+
+
 # Engine setup optimized for Neon
 engine = create_engine(
     DATABASE_URL,
-    pool_size=2,
-    max_overflow=8,
+    poolclass=InstrumentedQueuePool,
+    pool_size=POOL_SIZE,
+    max_overflow=MAX_OVERFLOW,
     pool_pre_ping=True,
-    pool_recycle=300,
-    pool_timeout=30,
+    pool_recycle=POOL_RECYCLE,
+    pool_timeout=POOL_TIMEOUT,
     echo=False
 )
 
+# Statement counts and timings for /metrics, per request and overall
+instrument_engine(engine)
+
+REGISTRY.register("db_pool_checkout_duration_seconds", "Time to check a connection out of the pool", checkout_latency)
+REGISTRY.register("db_pool_checkout_wait_seconds", "Checkout time when the pool was exhausted", checkout_wait)
+REGISTRY.register("db_pool_checkout_timeouts_total", "Checkouts that gave up waiting", checkout_timeouts)
+REGISTRY.register("db_pool_connect_errors_total", "Checkouts that failed to open a new connection", connect_errors)
+REGISTRY.gauge("db_pool_checked_out", "Connections currently in use", callback=lambda: engine.pool.checkedout())
+REGISTRY.gauge("db_pool_overflow", "Connections open beyond pool_size", callback=lambda: max(engine.pool.overflow(), 0))
+
+# Same pool settings as the primary; pool metrics above cover the primary only
+replica_engines = [
+    create_engine(
+        url,
+        pool_size=POOL_SIZE,
+        max_overflow=MAX_OVERFLOW,
+        pool_pre_ping=True,
+        pool_recycle=POOL_RECYCLE,
+        pool_timeout=POOL_TIMEOUT,
+        echo=False
+    )
+    for url in DATABASE_REPLICA_URLS
+]
+for replica_engine in replica_engines:
+    instrument_engine(replica_engine)
+
 def get_session():
     """Dependency to get DB session"""
-    with Session(engine) as session:
+    # Writes return their rows via RETURNING, so objects stay usable after
+    # commit without a refresh SELECT
+    with Session(engine, expire_on_commit=False) as session:
         yield session
 
 def init_db():
     """Initialize the database tables"""
     # Import models here to ensure they are registered with SQLModel
-    import models 
-    
+    import models
+    from search import ensure_search_index
+
     # Create all tables defined in models.py
     SQLModel.metadata.create_all(engine)
-    print("Database tables created or verified successfully")
 
-# Function to handle automatic updated_at timestamp
-@event.listens_for(Engine, "before_cursor_execute", retval=True)
-def comment_sql_calls(conn, cursor, statement, parameters, context, executemany):
-    # This is a helper for Neon to keep connections clean
-    return statement, parameters
\ No newline at end of file
+    # Full-text index for task search (tsvector + GIN, or SQLite FTS5)
+    with engine.begin() as connection:
+        ensure_search_index(connection)
+    logger.info("Database tables created or verified successfully")
+
+def setup_schema():
+    """
+    Apply SCHEMA_SETUP. Run once per deploy (the gunicorn master does this)
+    rather than in every worker.
+    """
+    if SCHEMA_SETUP == "create_all":
+        init_db()
+    elif SCHEMA_SETUP == "migrate":
+        from alembic import command
+        from alembic.config import Config
+
+        command.upgrade(Config(os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini")), "head")
+        logger.info("Database migrated to head")
+    elif SCHEMA_SETUP != "none":
+        raise ValueError(f"Unknown SCHEMA_SETUP {SCHEMA_SETUP!r}")
+
+def get_pool_metrics() -> dict:
+    """
+    Snapshot of pool occupancy and checkout timings
+    """
+    pool = engine.pool
+    wait = checkout_wait.snapshot()
+    return {
+        "pool_size": pool.size(),
+        "max_overflow": MAX_OVERFLOW,
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "checkout_timeouts": int(checkout_timeouts.value),
+        "connect_errors": int(connect_errors.value),
+        "wait_count": wait["count"],
+        "wait_seconds_total": wait["sum"],
+        "checkout_latency_seconds": checkout_latency.snapshot(),
+    }
+
+# Optional per-query timing hook for spotting slow queries
+if SLOW_QUERY_MS > 0:
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _log_slow_query(conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info["query_start_time"].pop()) * 1000
+        if elapsed_ms >= SLOW_QUERY_MS:
+            logger.warning("Slow query (%.1f ms): %s", elapsed_ms, statement)
+
+    @event.listens_for(engine, "handle_error")
+    def _discard_query_timer(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start_time"):
+            conn.info["query_start_time"].pop()
@@ -0,0 +1,223 @@
+import asyncio
+import json
+import os
+import select
+import threading
+from typing import AsyncIterator, Dict, Iterable, Optional, Set
+from dotenv import load_dotenv
+from fastapi import Request
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+from db import engine
+from serialization import dumps
+from logging_config import get_logger
+
+# Load environment variables
+load_dotenv()
+
+logger = get_logger(__name__)
+
+# "local" fans events out within this process; "postgres" relays them through
+# LISTEN/NOTIFY so subscribers on every worker see every write
+TASK_EVENTS_BACKEND = os.getenv("TASK_EVENTS_BACKEND", "local").lower()
+TASK_EVENTS_CHANNEL = os.getenv("TASK_EVENTS_CHANNEL", "p2_task_events")
+# Events buffered per subscriber; a client that falls further behind is told to resync
+TASK_EVENTS_QUEUE_SIZE = int(os.getenv("TASK_EVENTS_QUEUE_SIZE", "100"))
+# Idle streams get a comment line this often so proxies keep them open
+TASK_EVENTS_HEARTBEAT = float(os.getenv("TASK_EVENTS_HEARTBEAT", "15"))
+
+# NOTIFY payloads are capped at 8000 bytes; larger tasks are sent as id-only
+_MAX_NOTIFY_PAYLOAD = 7900
+
+_PENDING_KEY = "pending_task_events"
+
+RESYNC = {"type": "resync"}
+_CLOSE = object()
+
+
+class TaskEventBroker:
+    """
+    Fans task change events out to per-user subscriber queues on the event
+    loop. Events are only delivered once the transaction that produced them
+    has committed.
+    """
+
+    def __init__(self, backend, queue_size: int):
+        self.backend = backend
+        self.queue_size = queue_size
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self.backend.start(self)
+
+    async def stop(self):
+        self.backend.stop()
+        for queues in self._subscribers.values():
+            for queue in queues:
+                _force_put(queue, _CLOSE)
+        self._loop = None
+
+    def subscribe(self, user_id: int) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue):
+        queues = self._subscribers.get(user_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[user_id]
+
+    def publish(self, session: Session, kind: str, task: dict, user_ids: Iterable[Optional[int]]):
+        """
+        Queue an event for the users a task belongs to. Delivered after
+        `session` commits and dropped if it rolls back.
+        """
+        recipients = sorted({user_id for user_id in user_ids if user_id is not None})
+        if recipients:
+            self.backend.send(session, {"type": kind, "task": task}, recipients)
+
+    def dispatch(self, message: dict, recipients: Iterable[int]):
+        """Hand an event to local subscribers; safe to call from any thread"""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(self._fanout, message, list(recipients))
+
+    def _fanout(self, message: dict, recipients):
+        for user_id in recipients:
+            for queue in self._subscribers.get(user_id, ()):
+                try:
+                    queue.put_nowait(message)
+                except asyncio.QueueFull:
+                    # Slow consumer: drop its backlog and ask it to refetch
+                    _drain(queue)
+                    queue.put_nowait(RESYNC)
+
+    async def stream(self, user_id: int, request: Request) -> AsyncIterator[str]:
+        """Server-sent events for one subscriber until it disconnects or the app stops"""
+        queue = self.subscribe(user_id)
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), TASK_EVENTS_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": keep-alive\n\n"
+                    continue
+                if message is _CLOSE:
+                    return
+                yield f"event: {message['type']}\ndata: {dumps(message.get('task')).decode('utf-8')}\n\n"
+        finally:
+            self.unsubscribe(user_id, queue)
+
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+
+def _drain(queue: asyncio.Queue):
+    while not queue.empty():
+        queue.get_nowait()
+
+
+def _force_put(queue: asyncio.Queue, item):
+    while True:
+        try:
+            queue.put_nowait(item)
+            return
+        except asyncio.QueueFull:
+            queue.get_nowait()
+
+
+class LocalEventBackend:
+    """Delivers events to subscribers in this process only"""
+
+    def start(self, broker: TaskEventBroker):
+        self.broker = broker
+
+    def stop(self):
+        pass
+
+    def send(self, session: Session, message: dict, recipients):
+        session.info.setdefault(_PENDING_KEY, []).append((message, recipients))
+
+
+class PostgresEventBackend:
+    """
+    Relays events through Postgres LISTEN/NOTIFY. NOTIFY is transactional,
+    so the database only broadcasts events from committed writes. A listener
+    thread per worker holds one dedicated connection outside the pool.
+    """
+
+    def __init__(self, channel: str):
+        self.channel = channel
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, broker: TaskEventBroker):
+        self.broker = broker
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._listen, name="task-events-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+
+    def send(self, session: Session, message: dict, recipients):
+        payload = dumps({"message": message, "recipients": recipients}).decode("utf-8")
+        if len(payload.encode("utf-8")) > _MAX_NOTIFY_PAYLOAD:
+            message = {"type": message["type"], "task": {"id": message["task"]["id"]}}
+            payload = dumps({"message": message, "recipients": recipients}).decode("utf-8")
+        session.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": self.channel, "payload": payload})
+
+    def _listen(self):
+        listener_engine = create_engine(engine.url, poolclass=NullPool)
+        while not self._stopping.is_set():
+            try:
+                connection = listener_engine.raw_connection()
+                try:
+                    dbapi_connection = connection.dbapi_connection
+                    dbapi_connection.autocommit = True
+                    with dbapi_connection.cursor() as cursor:
+                        cursor.execute(f'LISTEN "{self.channel}"')
+                    logger.info("Listening for task events", extra={"channel": self.channel})
+                    while not self._stopping.is_set():
+                        if select.select([dbapi_connection], [], [], 1.0) == ([], [], []):
+                            continue
+                        dbapi_connection.poll()
+                        while dbapi_connection.notifies:
+                            notify = dbapi_connection.notifies.pop(0)
+                            data = json.loads(notify.payload)
+                            self.broker.dispatch(data["message"], data["recipients"])
+                finally:
+                    connection.close()
+            except Exception:
+                logger.exception("Task event listener failed; reconnecting")
+                self._stopping.wait(5)
+        listener_engine.dispose()
+
+
+@event.listens_for(Session, "after_commit")
+def _deliver_pending(session):
+    for message, recipients in session.info.pop(_PENDING_KEY, ()):
+        task_events.dispatch(message, recipients)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def _create_backend():
+    if TASK_EVENTS_BACKEND == "postgres":
+        return PostgresEventBackend(TASK_EVENTS_CHANNEL)
+    return LocalEventBackend()
+
+
+task_events = TaskEventBroker(_create_backend(), TASK_EVENTS_QUEUE_SIZE)
@@ -0,0 +1,81 @@
+"""
+Production server settings, picked up by `gunicorn main:app` from the
+working directory.
+
+The master imports the app once (preload_app), brings the schema up to date
+once (SCHEMA_SETUP, see db.setup_schema), then forks uvicorn workers that
+skip init_db on startup. Scaling out workers or replicas no longer repeats
+create_all and its DDL round-trips on every boot.
+"""
+import math
+import os
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# The master sets up the schema below, so workers don't on startup
+os.environ.setdefault("INIT_DB_ON_STARTUP", "false")
+
+
+def _available_cpus() -> int:
+    """CPUs this process may use, including a container's cgroup CPU quota"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    quota = None
+    try:
+        # cgroup v2: "<quota> <period>" or "max <period>"
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            limit, period = f.read().split()
+            if limit != "max":
+                quota = int(limit) / int(period)
+    except (OSError, ValueError):
+        try:
+            # cgroup v1: quota is -1 when unlimited
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+                limit = int(f.read())
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+                period = int(f.read())
+            if limit > 0:
+                quota = limit / period
+        except (OSError, ValueError):
+            pass
+    if quota is not None:
+        cpus = min(cpus, math.ceil(quota))
+    return max(1, cpus)
+
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+# One async worker per available core. Each worker has its own connection
+# pool of up to DB_POOL_SIZE + DB_MAX_OVERFLOW, so keep workers x pool under
+# the database's connection limit.
+workers = int(os.getenv("WEB_CONCURRENCY") or _available_cpus())
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = True
+# Seconds workers get to finish in-flight requests after SIGTERM
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+keepalive = int(os.getenv("KEEPALIVE", "5"))
+
+
+def on_starting(server):
+    from db import engine, replica_engines, setup_schema
+
+    setup_schema()
+    # Don't hand the master's pooled connections to forked workers
+    for pooled in [engine, *replica_engines]:
+        pooled.dispose()
+
+
+def post_fork(server, worker):
+    from db import engine, replica_engines
+    from logging_config import restart_after_fork
+
+    # The master's log listener thread isn't carried over by fork; without a
+    # new one the worker's records pile up in the queue and are never written
+    restart_after_fork()
+    # Drop any pool state inherited from the master without closing its sockets
+    for pooled in [engine, *replica_engines]:
+        pooled.dispose(close=False)
@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from typing import NamedTuple, Optional
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from fastapi.responses import Response
+from sqlmodel import Session, select
+from sqlalchemy import delete, event
+from models import IdempotencyKey
+from db import engine
+from background import register_job
+from logging_config import get_logger
+from ttl_cache import TTLCache
+
+# Load environment variables
+load_dotenv()
+
+logger = get_logger(__name__)
+
+# How long a key is remembered; retries after that create a new resource
+IDEMPOTENCY_KEY_TTL = timedelta(hours=float(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", "24")))
+# Recently stored responses kept in process so most retries skip the database
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+IDEMPOTENCY_SWEEP_INTERVAL = float(os.getenv("IDEMPOTENCY_SWEEP_INTERVAL", "3600"))
+MAX_KEY_LENGTH = 255
+
+_PENDING_KEY = "pending_idempotency_responses"
+
+
+class StoredResponse(NamedTuple):
+    fingerprint: str
+    status_code: int
+    body: bytes
+    expires_at: float  # Wall clock, so entries loaded from the table expire on time
+
+
+# Responses by (user id, scope, key)
+idempotency_cache = TTLCache(IDEMPOTENCY_CACHE_SIZE, IDEMPOTENCY_KEY_TTL.total_seconds())
+
+
+def check_key(key: str):
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters")
+
+
+def request_fingerprint(payload: dict) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def lookup_response(session: Session, user_id: int, scope: str, key: str) -> Optional[StoredResponse]:
+    """The response stored for this key, from the cache or the table"""
+    cache_key = (user_id, scope, key)
+    stored = idempotency_cache.get(cache_key)
+    if stored is not None:
+        return stored
+
+    row = session.exec(select(IdempotencyKey).where(
+        IdempotencyKey.user_id == user_id, IdempotencyKey.scope == scope, IdempotencyKey.key == key
+    )).first()
+    if row is None:
+        return None
+    expires_at = row.created_at + IDEMPOTENCY_KEY_TTL
+    if expires_at <= datetime.utcnow():
+        # Expired but not swept yet; free the key for this request
+        session.delete(row)
+        session.flush()
+        return None
+    stored = StoredResponse(
+        row.fingerprint, row.status_code, row.response.encode("utf-8"),
+        time.time() + (expires_at - datetime.utcnow()).total_seconds()
+    )
+    idempotency_cache.put(cache_key, stored, stored.expires_at)
+    return stored
+
+
+def save_response(session: Session, user_id: int, scope: str, key: str, fingerprint: str, status_code: int, body: bytes):
+    """Store the response in the same transaction as the change it describes; cached on commit"""
+    now = datetime.utcnow()
+    session.add(IdempotencyKey(
+        user_id=user_id, scope=scope, key=key, fingerprint=fingerprint,
+        status_code=status_code, response=body.decode("utf-8"), created_at=now
+    ))
+    stored = StoredResponse(fingerprint, status_code, body, time.time() + IDEMPOTENCY_KEY_TTL.total_seconds())
+    session.info.setdefault(_PENDING_KEY, []).append(((user_id, scope, key), stored))
+
+
+def replay(stored: StoredResponse, fingerprint: str) -> Response:
+    if stored.fingerprint != fingerprint:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+    return Response(
+        stored.body, status_code=stored.status_code, media_type="application/json",
+        headers={"Idempotent-Replayed": "true"}
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _cache_saved(session):
+    for cache_key, stored in session.info.pop(_PENDING_KEY, ()):
+        idempotency_cache.put(cache_key, stored, stored.expires_at)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_saved(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def prune_idempotency_keys() -> int:
+    cutoff = datetime.utcnow() - IDEMPOTENCY_KEY_TTL
+    with Session(engine) as session:
+        deleted = session.execute(
+            delete(IdempotencyKey).where(IdempotencyKey.created_at < cutoff)
+        ).rowcount
+        session.commit()
+    logger.info("Pruned idempotency keys", extra={"deleted": deleted})
+    return deleted
+
+
+register_job("prune_idempotency_keys", IDEMPOTENCY_SWEEP_INTERVAL, prune_idempotency_keys)
@@ -0,0 +1,130 @@
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()  # "json" or "text"
+# Fraction of DEBUG/INFO records kept; WARNING and above are never sampled out
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+
+# Attributes present on every LogRecord; anything else came from `extra=` and is emitted as a field
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+# Library loggers that are far too chatty at DEBUG (pool checkouts, event loop internals)
+_QUIET_LOGGERS = ("asyncio", "sqlalchemy", "db.InstrumentedQueuePool")
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line with timestamp, level, logger, message and any `extra` fields
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack_info"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread. The stdlib
+    prepare() formats the whole record on the logging thread, folding the
+    traceback into the message and dropping exc_info; this one only merges
+    the arguments, so the exception reaches the formatter as its own field.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep a random fraction of records below WARNING so verbose levels can be
+    enabled in production at bounded cost
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.rate >= 1.0:
+            return True
+        return random.random() < self.rate
+
+
+def setup_logging():
+    """
+    Route all logging through a queue so request handlers only pay for an
+    enqueue; a background listener thread formats and writes to stdout.
+    Safe to call more than once; forked processes must call
+    restart_after_fork() instead.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    if LOG_FORMAT == "text":
+        stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s"))
+    else:
+        stream_handler.setFormatter(JsonFormatter())
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(LOG_SAMPLE_RATE))
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(LOG_LEVEL)
+    for name in _QUIET_LOGGERS:
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+def restart_after_fork():
+    """
+    Give a forked process its own queue and listener. Only the forking thread
+    survives fork(), so records queued for the parent's listener would never
+    be written.
+    """
+    global _listener
+    if _listener is not None:
+        atexit.unregister(_listener.stop)
+        _listener = None
+    setup_logging()
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(name)
@@ -1,16 +1,35 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from db import init_db
+from db import setup_schema, get_pool_metrics
 import os
 from dotenv import load_dotenv
-from auth_utils import get_current_user
+from auth_utils import get_current_user, token_cache
+from user_cache import user_cache
 from fastapi import Depends
+from logging_config import setup_logging, get_logger
+from background import start_jobs, stop_jobs
+from events import task_events
+from middleware import CompressionMiddleware, CacheControlMiddleware
+from rate_limit import RateLimitMiddleware
+from read_replicas import ReadYourWritesMiddleware
+from app_metrics import MetricsMiddleware, metrics_response
 
 # Load environment variables
 load_dotenv()
 
+setup_logging()
+logger = get_logger(__name__)
+
+# gunicorn.conf.py turns this off and sets up the schema once in the master
+INIT_DB_ON_STARTUP = os.getenv("INIT_DB_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+
 app = FastAPI(title="Todo API", version="1.0.0")
 
+# Added before CORS so it runs inside it and 429s still carry CORS headers
+app.add_middleware(RateLimitMiddleware)
+# Pins a user's reads to the primary right after they write (only with replicas)
+app.add_middleware(ReadYourWritesMiddleware)
+
 # UPDATED: Allow all origins so Vercel can connect
 app.add_middleware(
     CORSMiddleware,
@@ -21,6 +40,12 @@ app.add_middleware(
     max_age=3600,
 )
 
+# Added after CORS so they wrap it: compression sees final bodies and headers
+app.add_middleware(CacheControlMiddleware)
+app.add_middleware(CompressionMiddleware)
+# Outermost, so timings include every other middleware (and 429s are counted)
+app.add_middleware(MetricsMiddleware)
+
 # Include authentication routes
 from routes.auth import router as auth_router
 app.include_router(auth_router, prefix="/api/v1", tags=["auth"])
@@ -32,17 +57,43 @@ app.include_router(tasks_router, prefix="/api/v1", tags=["tasks"])
 @app.on_event("startup")
 async def startup_event():
     """Initialize database and create tables on startup"""
-    try:
-        init_db()
-        print("Database initialized successfully")
-    except Exception as e:
-        print(f"Database initialization failed: {e}")
+    if INIT_DB_ON_STARTUP:
+        try:
+            setup_schema()
+            logger.info("Database initialized successfully")
+        except Exception:
+            logger.exception("Database initialization failed")
+
+    # Periodic maintenance (expired refresh token sweeper, ...)
+    start_jobs()
+    task_events.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background jobs and close open event streams"""
+    await task_events.stop()
+    await stop_jobs()
 
 @app.get("/")
 def read_root():
     """Root endpoint for health check"""
     return {"message": "Todo API is running", "status": "healthy"}
 
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Request, database and pool metrics in the Prometheus text format"""
+    return metrics_response()
+
+@app.get("/metrics/pool", include_in_schema=False)
+def pool_metrics():
+    """Database connection pool occupancy and checkout latency"""
+    return get_pool_metrics()
+
+@app.get("/metrics/auth", include_in_schema=False)
+def auth_metrics():
+    """Verified JWT cache size and hit/miss counters"""
+    return {"token_cache": token_cache.stats(), "user_cache": user_cache.stats()}
+
 @app.get("/protected")
 def protected_route(current_user: dict = Depends(get_current_user)):
     """Protected route that requires authentication"""
@@ -53,7 +104,7 @@ def protected_route(current_user: dict = Depends(get_current_user)):
     }
 
 def main():
-    """Main function for development"""
+    """Main function for development; production runs `gunicorn main:app` (see gunicorn.conf.py)"""
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
 
@@ -0,0 +1,191 @@
+import os
+import zlib
+from typing import List, Optional, Tuple
+from dotenv import load_dotenv
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# brotli is optional: it beats gzip on JSON, but gzip is used without it
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Load environment variables
+load_dotenv()
+
+# Encodings offered, in order of preference; empty disables compression
+COMPRESSION_ENCODINGS = [
+    encoding.strip().lower()
+    for encoding in os.getenv("COMPRESSION_ENCODINGS", "br,gzip").split(",")
+    if encoding.strip() and (encoding.strip().lower() != "br" or brotli is not None)
+]
+# Bodies smaller than this aren't worth the CPU or the encoding overhead
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript")
+# Server-sent events must reach the client as soon as they're written
+EXCLUDED_TYPES = ("text/event-stream",)
+
+# Cache-Control for responses that don't set their own, as "prefix=policy"
+# rules separated by ";". The longest matching path prefix wins.
+DEFAULT_CACHE_POLICIES = "/api/v1/auth=no-store;/api/v1/tasks=private, no-cache;/metrics=no-store;/=no-cache"
+CACHE_POLICIES = os.getenv("CACHE_CONTROL_POLICIES", DEFAULT_CACHE_POLICIES)
+
+
+class _GzipEncoder:
+    def __init__(self):
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def encode(self, data: bytes, final: bool) -> bytes:
+        # Sync-flush streamed chunks so each one reaches the client promptly
+        out = self._compressor.compress(data)
+        return out + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class _BrotliEncoder:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def encode(self, data: bytes, final: bool) -> bytes:
+        out = self._compressor.process(data)
+        return out + (self._compressor.finish() if final else self._compressor.flush())
+
+
+ENCODERS = {"gzip": _GzipEncoder, "br": _BrotliEncoder}
+
+
+def negotiate_encoding(accept_encoding: str, offered: List[str]) -> Optional[str]:
+    """Pick the first offered encoding the client accepts with q > 0"""
+    accepted = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip()] = quality
+    for encoding in offered:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+class CompressionMiddleware:
+    """
+    Compress response bodies with brotli or gzip, depending on what the
+    client accepts. Small bodies, already-encoded responses and event
+    streams are sent as-is. Streamed bodies are compressed chunk by chunk.
+    """
+
+    def __init__(self, app: ASGIApp, encodings: List[str] = COMPRESSION_ENCODINGS,
+                 minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.encodings = encodings
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self.encodings:
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        start: Optional[Message] = None
+        encoder = None
+
+        async def send_compressed(message: Message):
+            nonlocal start, encoder
+            if message["type"] == "http.response.start":
+                # Held back until the first body chunk shows whether to compress
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                if start is not None:
+                    await send(start)
+                    start = None
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start is not None:
+                headers = MutableHeaders(raw=start["headers"])
+                if self._compressible(start["status"], headers):
+                    headers.add_vary_header("Accept-Encoding")
+                    if encoding is not None and (more_body or len(body) >= self.minimum_size):
+                        encoder = ENCODERS[encoding]()
+                        headers["Content-Encoding"] = encoding
+                        body = encoder.encode(body, final=not more_body)
+                        if more_body:
+                            del headers["Content-Length"]
+                        else:
+                            headers["Content-Length"] = str(len(body))
+                            encoder = None
+                        message = {**message, "body": body}
+                await send(start)
+                start = None
+            elif encoder is not None:
+                message = {**message, "body": encoder.encode(body, final=not more_body)}
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
+
+    @staticmethod
+    def _compressible(status: int, headers: MutableHeaders) -> bool:
+        if status < 200 or status in (204, 304) or "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "")
+        return content_type.startswith(COMPRESSIBLE_TYPES) and not content_type.startswith(EXCLUDED_TYPES)
+
+
+def parse_cache_policies(value: str) -> List[Tuple[str, str]]:
+    policies = []
+    for rule in value.split(";"):
+        prefix, sep, policy = rule.partition("=")
+        if sep and prefix.strip():
+            policies.append((prefix.strip(), policy.strip()))
+    # Longest prefix first so the most specific rule matches
+    return sorted(policies, key=lambda item: len(item[0]), reverse=True)
+
+
+class CacheControlMiddleware:
+    """
+    Add a per-route Cache-Control header to GET/HEAD responses that don't set
+    one. Other methods are never cacheable and get no-store.
+    """
+
+    def __init__(self, app: ASGIApp, policies: str = CACHE_POLICIES):
+        self.app = app
+        self.policies = parse_cache_policies(policies)
+
+    def policy_for(self, method: str, path: str) -> Optional[str]:
+        if method not in ("GET", "HEAD"):
+            return "no-store"
+        for prefix, policy in self.policies:
+            if path == prefix or path.startswith(prefix.rstrip("/") + "/"):
+                return policy
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        policy = self.policy_for(scope["method"], scope["path"])
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_policy(message: Message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                if "cache-control" not in headers:
+                    headers["Cache-Control"] = policy
+            await send(message)
+
+        await self.app(scope, receive, send_with_policy)
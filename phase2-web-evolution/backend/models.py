@@ -1,7 +1,7 @@
 from sqlmodel import SQLModel, Field, Relationship
 from typing import Optional, List
 from datetime import datetime
-from sqlalchemy import Column, String, Text, DateTime
+from sqlalchemy import Column, String, Text, DateTime, Index, UniqueConstraint, text
 import enum
 
 # Define enums
@@ -38,6 +38,18 @@ class User(SQLModel, table=True):
 class Task(SQLModel, table=True):
     # Tablename change to separate Phase 2
     __tablename__ = "p2_tasks"
+    __table_args__ = (
+        # Due-date filters only look at open tasks; queries must repeat the
+        # predicate with a literal 'completed' for the planner to use it
+        Index(
+            "ix_p2_tasks_due_date_open", "due_date",
+            postgresql_where=text("status != 'completed'"),
+            sqlite_where=text("status != 'completed'")
+        ),
+        # Without AUTOINCREMENT SQLite reuses the highest id once it's deleted
+        # or archived, handing new tasks the ids of archived ones
+        {"sqlite_autoincrement": True},
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     title: str = Field(sa_column=Column(String, nullable=False))
@@ -51,8 +63,10 @@ class Task(SQLModel, table=True):
     assigned_to: Optional[int] = Field(default=None, foreign_key="p2_users.id")
     
     created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
-    updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
-    completed_at: Optional[datetime] = Field(sa_column=Column(DateTime))
+    # Indexed so max(updated_at), the list ETag version, is an index lookup
+    updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False, index=True)
+    # Indexed for the archival job's scan for old completed tasks
+    completed_at: Optional[datetime] = Field(sa_column=Column(DateTime, index=True))
 
     creator: User = Relationship(
         back_populates="tasks",
@@ -60,4 +74,68 @@ class Task(SQLModel, table=True):
     )
     assigned_user: Optional[User] = Relationship(
         sa_relationship_kwargs={"foreign_keys": "[Task.assigned_to]"}
-    )
\ No newline at end of file
+    )
+
+class ArchivedTask(SQLModel, table=True):
+    # Completed tasks moved out of p2_tasks by the archival job (task_archive.py)
+    __tablename__ = "p2_tasks_archive"
+
+    # Keeps the id the task had in p2_tasks
+    id: int = Field(primary_key=True, sa_column_kwargs={"autoincrement": False})
+    title: str = Field(sa_column=Column(String, nullable=False))
+    description: Optional[str] = Field(sa_column=Column(Text))
+    status: str = Field(sa_column=Column(String, nullable=False))
+    priority: str = Field(sa_column=Column(String, nullable=False))
+    due_date: Optional[datetime] = Field(sa_column=Column(DateTime))
+    created_by: int = Field(foreign_key="p2_users.id", nullable=False, index=True)
+    assigned_to: Optional[int] = Field(default=None, foreign_key="p2_users.id")
+    created_at: datetime = Field(nullable=False, index=True)
+    updated_at: datetime = Field(nullable=False)
+    completed_at: Optional[datetime] = Field(sa_column=Column(DateTime))
+    archived_at: datetime = Field(sa_column=Column(DateTime, nullable=False))
+
+class RefreshToken(SQLModel, table=True):
+    __tablename__ = "p2_refresh_tokens"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    # JWT ID of the issued refresh token; unique index makes revocation lookups a single probe
+    jti: str = Field(sa_column=Column(String, unique=True, nullable=False, index=True))
+    user_id: int = Field(foreign_key="p2_users.id", nullable=False, index=True)
+    created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+    expires_at: datetime = Field(sa_column=Column(DateTime, nullable=False, index=True))
+    revoked_at: Optional[datetime] = Field(default=None, sa_column=Column(DateTime))
+
+class TaskTombstone(SQLModel, table=True):
+    # Records deleted task ids so incremental sync can report deletions
+    __tablename__ = "p2_task_tombstones"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    # No foreign key: the task row is gone by the time this is read
+    task_id: int = Field(nullable=False)
+    deleted_at: datetime = Field(sa_column=Column(DateTime, nullable=False, index=True))
+
+class TaskStatsSummary(SQLModel, table=True):
+    # Per-user cache of GET /tasks/stats, marked stale by task writes
+    __tablename__ = "p2_task_stats"
+
+    user_id: int = Field(foreign_key="p2_users.id", primary_key=True)
+    payload: str = Field(sa_column=Column(Text, nullable=False))
+    computed_at: datetime = Field(sa_column=Column(DateTime, nullable=False))
+    stale: bool = Field(default=False, nullable=False)
+
+class IdempotencyKey(SQLModel, table=True):
+    # Responses to requests sent with an Idempotency-Key header, replayed on retries
+    __tablename__ = "p2_idempotency_keys"
+    # The unique key also serves lookups; a concurrent retry loses on insert
+    __table_args__ = (UniqueConstraint("user_id", "scope", "key", name="uq_p2_idempotency_keys_user_scope_key"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: int = Field(foreign_key="p2_users.id", nullable=False)
+    # Which operation the key was used for, e.g. "create_task"
+    scope: str = Field(sa_column=Column(String, nullable=False))
+    key: str = Field(sa_column=Column(String, nullable=False))
+    # Hash of the request body; reusing a key for a different body is an error
+    fingerprint: str = Field(sa_column=Column(String, nullable=False))
+    status_code: int = Field(nullable=False)
+    response: str = Field(sa_column=Column(Text, nullable=False))
+    created_at: datetime = Field(sa_column=Column(DateTime, nullable=False, index=True))
@@ -0,0 +1,103 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# scrypt cost parameters; raising SCRYPT_N doubles CPU and memory per hash.
+# Existing hashes keep working and are upgraded on the next successful login.
+SCRYPT_N = int(os.getenv("SCRYPT_N", "16384"))
+SCRYPT_R = int(os.getenv("SCRYPT_R", "8"))
+SCRYPT_P = int(os.getenv("SCRYPT_P", "1"))
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+# Hashing runs on a dedicated, bounded pool so it never blocks the event loop
+# and a burst of logins can't starve the default executor used by FastAPI
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+
+# Accounts created before real hashing stored "hashed_<password>"
+LEGACY_PREFIX = "hashed_"
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii")
+
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(
+        password.encode("utf-8"),
+        salt=salt,
+        n=n,
+        r=r,
+        p=p,
+        maxmem=256 * n * r,  # scrypt needs ~128*n*r bytes; leave headroom
+        dklen=KEY_BYTES
+    )
+
+
+def hash_password(password: str) -> str:
+    """
+    Hash a password as "scrypt$n$r$p$salt$key" (base64 salt and key)
+    """
+    salt = os.urandom(SALT_BYTES)
+    key = _scrypt(password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    return f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${_b64encode(salt)}${_b64encode(key)}"
+
+
+def verify_password(password: str, stored_hash: str) -> bool:
+    """
+    Check a password against a stored hash in constant time
+    """
+    if stored_hash.startswith(LEGACY_PREFIX):
+        return hmac.compare_digest(stored_hash[len(LEGACY_PREFIX):].encode(), password.encode())
+
+    try:
+        scheme, n, r, p, salt, key = stored_hash.split("$")
+        if scheme != "scrypt":
+            return False
+        expected = base64.b64decode(key)
+        actual = _scrypt(password, base64.b64decode(salt), int(n), int(r), int(p))
+    except ValueError:
+        return False
+    return hmac.compare_digest(actual, expected)
+
+
+def needs_rehash(stored_hash: str) -> bool:
+    """
+    True for legacy hashes and hashes made with different cost parameters
+    """
+    return not stored_hash.startswith(f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}$")
+
+
+@lru_cache(maxsize=1)
+def _dummy_hash() -> str:
+    return hash_password("dummy-password-for-timing")
+
+
+async def hash_password_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, hash_password, password)
+
+
+async def verify_password_async(password: str, stored_hash: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, verify_password, password, stored_hash)
+
+
+async def burn_verify_time(password: str):
+    """
+    Spend the same work as a real verification when the account doesn't
+    exist, so response time doesn't reveal which emails are registered
+    """
+    loop = asyncio.get_running_loop()
+    dummy = await loop.run_in_executor(_executor, _dummy_hash)
+    await verify_password_async(password, dummy)
@@ -0,0 +1,209 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from dotenv import load_dotenv
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from auth_utils import bearer_user_id
+from logging_config import get_logger
+from redis_client import get_redis
+
+# Load environment variables
+load_dotenv()
+
+logger = get_logger(__name__)
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+# "local" keeps buckets in process (limits are per worker); "redis" shares them
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "local").lower()
+# Buckets tracked by the local store; the least recently used are evicted
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+# Only honour X-Forwarded-For behind a proxy that sets it, or clients can pick their own IP
+RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() in ("1", "true", "yes")
+
+# Defaults follow the API spec: 100 requests/minute per IP, 1000/hour per
+# user, and bursts of up to twice the per-minute rate
+RATE_LIMIT_IP_PER_MINUTE = float(os.getenv("RATE_LIMIT_IP_PER_MINUTE", "100"))
+RATE_LIMIT_USER_PER_HOUR = float(os.getenv("RATE_LIMIT_USER_PER_HOUR", "1000"))
+# Login/register hash passwords, so they get a much smaller per-IP budget
+RATE_LIMIT_AUTH_PER_MINUTE = float(os.getenv("RATE_LIMIT_AUTH_PER_MINUTE", "10"))
+RATE_LIMIT_BURST_FACTOR = float(os.getenv("RATE_LIMIT_BURST_FACTOR", "2"))
+
+
+def _bucket(per_minute: float) -> Tuple[float, float]:
+    """(tokens per second, capacity) for a per-minute allowance"""
+    return per_minute / 60, max(1.0, per_minute * RATE_LIMIT_BURST_FACTOR)
+
+
+IP_BUCKET = _bucket(RATE_LIMIT_IP_PER_MINUTE)
+USER_BUCKET = _bucket(RATE_LIMIT_USER_PER_HOUR / 60)
+AUTH_BUCKET = _bucket(RATE_LIMIT_AUTH_PER_MINUTE)
+
+AUTH_PATHS = ("/api/v1/auth/login", "/api/v1/auth/register")
+EXEMPT_PATHS = ("/", "/metrics")
+
+
+class LocalRateLimitStore:
+    """In-process token buckets keyed by string, bounded by LRU eviction"""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    def take(self, buckets: List[Tuple[str, float, float]], cost: float = 1.0) -> Tuple[bool, List[float]]:
+        """
+        Spend `cost` tokens from every (key, rate, burst) bucket, or from none
+        if any of them is short. Returns (allowed, tokens left per bucket)
+        """
+        now = time.monotonic()
+        with self._lock:
+            levels = []
+            for key, rate, burst in buckets:
+                tokens, updated_at = self._buckets.pop(key, (burst, now))
+                levels.append(min(burst, tokens + (now - updated_at) * rate))
+            allowed = all(tokens >= cost for tokens in levels)
+            if allowed:
+                levels = [tokens - cost for tokens in levels]
+            for (key, _, _), tokens in zip(buckets, levels):
+                self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, levels
+
+
+class RedisRateLimitStore:
+    """
+    Token buckets shared by every worker. One Lua script checks and spends
+    all of a request's buckets atomically. Keys expire once the bucket would
+    be full again.
+    """
+
+    _SCRIPT = """
+    local cost = tonumber(ARGV[1])
+    local now = redis.call('TIME')
+    now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+    local levels = {}
+    local allowed = 1
+    for i, key in ipairs(KEYS) do
+        local rate, burst = tonumber(ARGV[2 * i]), tonumber(ARGV[2 * i + 1])
+        local state = redis.call('HMGET', key, 'tokens', 'ts')
+        local tokens = tonumber(state[1]) or burst
+        local ts = tonumber(state[2]) or now
+        levels[i] = math.min(burst, tokens + (now - ts) * rate)
+        if levels[i] < cost then
+            allowed = 0
+        end
+    end
+    local result = {allowed}
+    for i, key in ipairs(KEYS) do
+        local rate, burst = tonumber(ARGV[2 * i]), tonumber(ARGV[2 * i + 1])
+        if allowed == 1 then
+            levels[i] = levels[i] - cost
+        end
+        redis.call('HSET', key, 'tokens', levels[i], 'ts', now)
+        redis.call('EXPIRE', key, math.ceil(burst / rate) + 1)
+        result[i + 1] = tostring(levels[i])
+    end
+    return result
+    """
+
+    def __init__(self, client):
+        self._client = client
+        self._take = self._client.register_script(self._SCRIPT)
+
+    def take(self, buckets: List[Tuple[str, float, float]], cost: float = 1.0) -> Tuple[bool, List[float]]:
+        args = [cost]
+        for _, rate, burst in buckets:
+            args += [rate, burst]
+        allowed, *levels = self._take(keys=[f"p2:ratelimit:{key}" for key, _, _ in buckets], args=args)
+        return bool(allowed), [float(tokens) for tokens in levels]
+
+
+def _create_store():
+    if RATE_LIMIT_BACKEND == "redis":
+        return RedisRateLimitStore(get_redis())
+    return LocalRateLimitStore(RATE_LIMIT_MAX_KEYS)
+
+
+def client_ip(scope: Scope) -> str:
+    if RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = Headers(scope=scope).get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def _user_id(scope: Scope) -> Optional[str]:
+    """User id from a valid bearer token. Unverified claims aren't trusted,
+    or a client could drain someone else's bucket."""
+    return bearer_user_id(Headers(scope=scope).get("authorization"))
+
+
+class RateLimitMiddleware:
+    """
+    Admission control in front of the routers: every request spends a token
+    from its client IP's bucket and, if authenticated, from its user's
+    bucket. Requests that find a bucket empty spend nothing and get 429
+    with Retry-After before they reach the database pool.
+    """
+
+    def __init__(self, app: ASGIApp, store=None):
+        self.app = app
+        self.store = store or _create_store()
+
+    def _buckets(self, scope: Scope) -> List[Tuple[str, float, float]]:
+        path = scope["path"]
+        ip = client_ip(scope)
+        if path in AUTH_PATHS:
+            return [(f"auth:{ip}", *AUTH_BUCKET)]
+        buckets = [(f"ip:{ip}", *IP_BUCKET)]
+        user_id = _user_id(scope)
+        if user_id is not None:
+            buckets.append((f"user:{user_id}", *USER_BUCKET))
+        return buckets
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (
+            scope["type"] != "http"
+            or not RATE_LIMIT_ENABLED
+            or scope["method"] == "OPTIONS"
+            or scope["path"] in EXEMPT_PATHS
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        # All buckets are spent together or not at all, so a request rejected
+        # by one bucket doesn't drain the others
+        buckets = self._buckets(scope)
+        allowed, levels = self.store.take(buckets)
+
+        # Headers describe the bucket closest to running out
+        (key, rate, burst), tokens = min(zip(buckets, levels), key=lambda item: item[1] / item[0][2])
+        headers = {
+            "X-RateLimit-Limit": str(int(burst)),
+            "X-RateLimit-Remaining": str(max(0, int(tokens))),
+            "X-RateLimit-Reset": str(math.ceil((burst - tokens) / rate))
+        }
+        if not allowed:
+            empty = [(key, rate, tokens) for (key, rate, _), tokens in zip(buckets, levels) if tokens < 1]
+            logger.debug("Rate limited", extra={
+                "buckets": [key.split(":", 1)[0] for key, _, _ in empty], "path": scope["path"]
+            })
+            # Every empty bucket has to refill before a retry can pass
+            headers["Retry-After"] = str(max(1, max(math.ceil((1 - tokens) / rate) for _, rate, tokens in empty)))
+            response = JSONResponse({"detail": "Too many requests"}, status_code=429, headers=headers)
+            await response(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(raw=message["headers"]).update(headers)
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
@@ -0,0 +1,126 @@
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict
+from dotenv import load_dotenv
+from fastapi import Request
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from auth_utils import bearer_user_id
+from db import engine, replica_engines
+from logging_config import get_logger
+from redis_client import get_redis
+
+# Load environment variables
+load_dotenv()
+
+logger = get_logger(__name__)
+
+# After a user writes, their reads go to the primary for this long, so they
+# see their own change however far the replicas lag (keep it above the
+# replication lag you expect)
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", "5"))
+# "local" remembers recent writers per process; with several workers or
+# replicas behind a load balancer use "redis" so every process sees them
+REPLICA_STICKY_BACKEND = os.getenv("REPLICA_STICKY_BACKEND", "local").lower()
+REPLICA_STICKY_MAX_USERS = int(os.getenv("REPLICA_STICKY_MAX_USERS", "100000"))
+
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class LocalStickyStore:
+    """Users who wrote recently, in process memory, bounded by LRU eviction"""
+
+    def __init__(self, max_users: int):
+        self.max_users = max_users
+        self._until = OrderedDict()  # user id -> monotonic deadline
+        self._lock = threading.Lock()
+
+    def mark(self, user_id: str, seconds: float):
+        with self._lock:
+            self._until.pop(user_id, None)
+            self._until[user_id] = time.monotonic() + seconds
+            if len(self._until) > self.max_users:
+                self._until.popitem(last=False)
+
+    def is_sticky(self, user_id: str) -> bool:
+        until = self._until.get(user_id)
+        return until is not None and until > time.monotonic()
+
+
+class RedisStickyStore:
+    """Users who wrote recently, as expiring Redis keys shared by every worker"""
+
+    def __init__(self, client):
+        self._client = client
+
+    def mark(self, user_id: str, seconds: float):
+        self._client.set(f"p2:replica_sticky:{user_id}", 1, px=max(1, int(seconds * 1000)))
+
+    def is_sticky(self, user_id: str) -> bool:
+        return bool(self._client.exists(f"p2:replica_sticky:{user_id}"))
+
+
+def _create_store():
+    if REPLICA_STICKY_BACKEND == "redis":
+        return RedisStickyStore(get_redis())
+    return LocalStickyStore(REPLICA_STICKY_MAX_USERS)
+
+
+sticky_users = _create_store()
+_next_replica = itertools.count()
+
+
+def _read_engine(user_id):
+    if not replica_engines or (user_id is not None and sticky_users.is_sticky(user_id)):
+        return engine
+    return replica_engines[next(_next_replica) % len(replica_engines)]
+
+
+def get_read_session(request: Request):
+    """
+    Dependency for read-only handlers: a session on a read replica, chosen
+    round-robin, or on the primary when there are none, the caller wrote
+    within REPLICA_STICKY_SECONDS, or the replica can't be reached.
+    Don't write through it.
+    """
+    bind = _read_engine(bearer_user_id(request.headers.get("authorization")))
+    session = Session(bind, expire_on_commit=False)
+    if bind is not engine:
+        try:
+            session.connection()
+        except OperationalError:
+            logger.warning("Read replica unavailable, reading from primary", exc_info=True)
+            session.close()
+            session = Session(engine, expire_on_commit=False)
+    with session:
+        yield session
+
+
+class ReadYourWritesMiddleware:
+    """
+    Marks the caller as a recent writer when a non-GET request succeeds, so
+    get_read_session keeps their reads on the primary until replicas have
+    caught up. A no-op without replicas.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not replica_engines or scope["method"] in READ_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_and_mark(message: Message):
+            # Handlers commit before responding, so the write is on the primary by now
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                user_id = bearer_user_id(Headers(scope=scope).get("authorization"))
+                if user_id is not None:
+                    sticky_users.mark(user_id, REPLICA_STICKY_SECONDS)
+            await send(message)
+
+        await self.app(scope, receive, send_and_mark)
@@ -0,0 +1,21 @@
+import os
+from functools import lru_cache
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+
+@lru_cache(maxsize=None)
+def get_redis():
+    """
+    The process-wide Redis client, created on first use, so every Redis
+    backend (refresh tokens, rate limits, replica stickiness) shares one
+    connection pool. redis is an optional dependency, only imported when a
+    backend is configured to use it.
+    """
+    import redis
+
+    return redis.Redis.from_url(REDIS_URL)
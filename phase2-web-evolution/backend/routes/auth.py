@@ -4,12 +4,20 @@ from typing import Optional
 from auth_utils import create_access_token, create_refresh_token, verify_refresh_token
 from models import User, TaskStatus, TaskPriority
 from sqlmodel import Session, select
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
 from db import get_session
-from datetime import timedelta
+from logging_config import get_logger
+from passwords import hash_password_async, verify_password_async, needs_rehash, burn_verify_time
+from token_store import token_store
+from user_cache import user_cache
+from datetime import datetime, timedelta
 import uuid
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
+logger = get_logger(__name__)
+
 # Request models
 class LoginRequest(BaseModel):
     email: str
@@ -45,16 +53,33 @@ class LoginResponse(BaseModel):
 
 @router.post("/login", response_model=LoginResponse)
 async def login(login_request: LoginRequest, session: Session = Depends(get_session)):
-    # In a real implementation, you would verify the password hash
-    # For now, we'll simulate finding a user
-    statement = select(User).where(User.email == login_request.email)
-    user = session.exec(statement).first()
+    user = user_cache.get_by_email(login_request.email)
+    if user is None:
+        statement = select(User).where(User.email == login_request.email)
+        db_user = session.exec(statement).first()
+        if db_user:
+            user = user_cache.put(db_user)
+
+        # End the read transaction so the connection goes back to the pool
+        # instead of being held while we wait on the password pool
+        session.commit()
 
     if not user:
+        await burn_verify_time(login_request.password)
+        logger.info("Login failed: unknown email")
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    # Hashing runs on the password pool, off the event loop
+    if not await verify_password_async(login_request.password, user.password_hash):
+        logger.info("Login failed: wrong password", extra={"user_id": user.id})
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    # In a real implementation, you would verify the password here
-    # For simulation purposes, we'll assume the password is correct
+    # Upgrade legacy or outdated hashes now that we know the plaintext
+    if needs_rehash(user.password_hash):
+        password_hash = await hash_password_async(login_request.password)
+        session.execute(update(User).where(User.id == user.id).values(password_hash=password_hash))
+        session.commit()
+        user = user_cache.update(user.id, password_hash=password_hash) or user
 
     # Create tokens
     access_token_expires = timedelta(hours=24)  # 24 hours as per spec
@@ -72,6 +97,9 @@ async def login(login_request: LoginRequest, session: Session = Depends(get_sess
         "type": "refresh"
     }
 
+    token_store.issue(session, refresh_token_data["jti"], user.id, datetime.utcnow() + refresh_token_expires)
+    session.commit()
+
     access_token = create_access_token(
         data=access_token_data,
         expires_delta=access_token_expires
@@ -99,21 +127,28 @@ async def login(login_request: LoginRequest, session: Session = Depends(get_sess
 
 @router.post("/register", response_model=LoginResponse)
 async def register(register_request: RegisterRequest, session: Session = Depends(get_session)):
-    # Check if user already exists
-    statement = select(User).where(
-        (User.email == register_request.email) | (User.username == register_request.username)
+    # Check if user already exists: cache first, then one lookup per unique
+    # index (an OR across both columns can't use either index well)
+    existing_user = (
+        user_cache.get_by_email(register_request.email)
+        or user_cache.get_by_username(register_request.username)
+        or session.exec(select(User.id).where(User.email == register_request.email)).first()
+        or session.exec(select(User.id).where(User.username == register_request.username)).first()
     )
-    existing_user = session.exec(statement).first()
+
+    # Release the connection before rejecting or hashing; holding it across
+    # either starves the pool under concurrent sign-ups
+    session.commit()
 
     if existing_user:
+        logger.info("Registration rejected: email or username already exists")
         raise HTTPException(status_code=409, detail="Email or username already exists")
 
-    # Create new user (in a real implementation, you would hash the password)
-    from datetime import datetime
+    # Create new user
     new_user = User(
         email=register_request.email,
         username=register_request.username,
-        password_hash=f"hashed_{register_request.password}",  # In real app, use proper hashing
+        password_hash=await hash_password_async(register_request.password),
         full_name=register_request.full_name,
         is_active=True,
         is_verified=False,
@@ -122,8 +157,14 @@ async def register(register_request: RegisterRequest, session: Session = Depends
     )
 
     session.add(new_user)
-    session.commit()
-    session.refresh(new_user)
+    try:
+        # Flush assigns the id; the unique constraints catch a concurrent
+        # registration that slipped past the checks above
+        session.flush()
+    except IntegrityError:
+        session.rollback()
+        logger.info("Registration rejected: email or username already exists")
+        raise HTTPException(status_code=409, detail="Email or username already exists")
 
     # Create tokens for the new user
     access_token_expires = timedelta(hours=24)  # 24 hours as per spec
@@ -141,6 +182,12 @@ async def register(register_request: RegisterRequest, session: Session = Depends
         "type": "refresh"
     }
 
+    # User row and refresh token are committed together
+    token_store.issue(session, refresh_token_data["jti"], new_user.id, datetime.utcnow() + refresh_token_expires)
+    session.commit()
+    user_cache.put(new_user)
+    logger.info("User registered", extra={"user_id": new_user.id})
+
     access_token = create_access_token(
         data=access_token_data,
         expires_delta=access_token_expires
@@ -167,14 +214,29 @@ async def register(register_request: RegisterRequest, session: Session = Depends
     )
 
 @router.post("/refresh", response_model=TokenResponse)
-async def refresh(refresh_request: RefreshRequest):
+async def refresh(refresh_request: RefreshRequest, session: Session = Depends(get_session)):
     # Verify the refresh token
     payload = verify_refresh_token(refresh_request.refresh_token)
 
     # Check if this is indeed a refresh token (by checking the type)
     if payload.get("type") != "refresh":
+        logger.warning("Refresh attempted with non-refresh token", extra={"user_id": payload.get("sub")})
         raise HTTPException(status_code=400, detail="Invalid token type")
 
+    jti = payload.get("jti")
+    if not jti:
+        raise HTTPException(status_code=401, detail="Refresh token has been revoked")
+
+    # Rotate: the presented token is single-use. A validly signed token that is
+    # already revoked has been replayed, so treat it as stolen and revoke every
+    # refresh token the user holds. The O(1) check rejects most replays without
+    # a write; revoke() catches concurrent ones.
+    if not token_store.is_active(session, jti) or not token_store.revoke(session, jti):
+        revoked = token_store.revoke_all_for_user(session, int(payload.get("sub")))
+        session.commit()
+        logger.warning("Refresh token reuse detected", extra={"user_id": payload.get("sub"), "revoked": revoked})
+        raise HTTPException(status_code=401, detail="Refresh token has been revoked")
+
     # Create new access token using the user info from the refresh token
     # In a real implementation, you might want to check if the user still exists
     # and is active in the database
@@ -203,8 +265,31 @@ async def refresh(refresh_request: RefreshRequest):
         expires_delta=refresh_token_expires
     )
 
+    token_store.issue(
+        session,
+        new_refresh_token_data["jti"],
+        int(payload.get("sub")),
+        datetime.utcnow() + refresh_token_expires
+    )
+    session.commit()
+
     return TokenResponse(
         access_token=new_access_token,
         refresh_token=new_refresh_token,
         expires_in=86400  # 24 hours in seconds
-    )
\ No newline at end of file
+    )
+
+@router.post("/logout")
+async def logout(refresh_request: RefreshRequest, session: Session = Depends(get_session)):
+    """
+    Revoke a refresh token so it can no longer be used
+    """
+    payload = verify_refresh_token(refresh_request.refresh_token)
+
+    if payload.get("type") != "refresh" or not payload.get("jti"):
+        raise HTTPException(status_code=400, detail="Invalid token type")
+
+    token_store.revoke(session, payload["jti"])
+    session.commit()
+
+    return {"success": True, "message": "Logged out successfully"}
\ No newline at end of file
@@ -1,15 +1,36 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Header, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
-from sqlmodel import Session, select, and_
-from sqlalchemy import func
-from models import Task, User, TaskStatus, TaskPriority
+from typing import Dict, List, Optional
+from sqlmodel import Session, select
+from sqlalchemy import func, insert, update, delete
+from sqlalchemy.exc import IntegrityError
+from models import Task, User, TaskStatus, TaskPriority, TaskTombstone, ArchivedTask
 from auth_utils import get_current_user
 from db import get_session
+from read_replicas import get_read_session
+from serialization import TASK_COLUMNS, parse_task_fields, task_row_to_dict, FastJSONResponse, dumps
+from etags import make_etag, etag_matches, not_modified, with_etag
+from events import task_events
+from task_sync import SyncCursor, Position, after, advance, is_expired, record_deletions
+from task_stats import get_stats, mark_stale
+from task_archive import ARCHIVED_TASK_COLUMNS, restore_archived
+from task_queries import SORT_FIELDS, list_queries
+from idempotency import check_key, request_fingerprint, lookup_response, save_response, replay
+from logging_config import get_logger
 from datetime import datetime
+import os
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 
+logger = get_logger(__name__)
+
+VALID_STATUSES = [s.value for s in TaskStatus]
+VALID_PRIORITIES = [p.value for p in TaskPriority]
+
+# Upper bound on items per batch request so one call can't hold a transaction open indefinitely
+MAX_BATCH_SIZE = int(os.getenv("TASK_BATCH_MAX_SIZE", "500"))
+
 # Request models
 class CreateTaskRequest(BaseModel):
     title: str
@@ -42,154 +63,540 @@ class TaskListResponse(BaseModel):
     tasks: List[TaskResponse]
     pagination: dict
 
+# Batch request/response models
+class BatchUpdateItem(UpdateTaskRequest):
+    id: int
+
+class BatchCreateRequest(BaseModel):
+    tasks: List[CreateTaskRequest]
+
+class BatchUpdateRequest(BaseModel):
+    tasks: List[BatchUpdateItem]
+
+class BatchDeleteRequest(BaseModel):
+    ids: List[int]
+
+class BatchError(BaseModel):
+    index: int
+    id: Optional[int] = None
+    detail: str
+
+class BatchTaskResult(TaskResponse):
+    index: int  # Position of the request item this task came from
+
+class BatchTaskResponse(BaseModel):
+    tasks: List[BatchTaskResult]
+    errors: List[BatchError]
+
+class TaskChangesResponse(BaseModel):
+    tasks: List[TaskResponse]
+    deleted: List[int]
+    cursor: str
+    has_more: bool
+
+class CompletionHours(BaseModel):
+    mean: Optional[float]
+    p50: Optional[float]
+    p90: Optional[float]
+    p99: Optional[float]
+
+class TaskStatsResponse(BaseModel):
+    total: int
+    by_status: Dict[str, int]
+    by_priority: Dict[str, int]
+    overdue: int
+    completion_hours: CompletionHours
+    generated_at: str
+
+class BatchDeleteResponse(BaseModel):
+    deleted: List[int]
+    errors: List[BatchError]
+
+def _task_to_response(task) -> TaskResponse:
+    """
+    Build a TaskResponse from a Task instance (or any row exposing the same attributes)
+    """
+    return TaskResponse(
+        id=task.id,
+        title=task.title,
+        description=task.description,
+        status=task.status,
+        priority=task.priority,
+        due_date=task.due_date.isoformat() if task.due_date else None,
+        created_by=task.created_by,
+        assigned_to=task.assigned_to,
+        created_at=task.created_at.isoformat(),
+        updated_at=task.updated_at.isoformat(),
+        completed_at=task.completed_at.isoformat() if task.completed_at else None
+    )
+
+def _batch_result(index: int, task) -> BatchTaskResult:
+    return BatchTaskResult(index=index, **_task_to_response(task).model_dump())
+
+def _new_task_values(task_request: CreateTaskRequest, user_id) -> dict:
+    """
+    Validate a create request and return column values for the new task.
+    Raises ValueError with a client-facing message on invalid input.
+    """
+    if task_request.priority not in VALID_PRIORITIES:
+        raise ValueError("Invalid priority")
+
+    now = datetime.utcnow()
+    return {
+        "title": task_request.title,
+        "description": task_request.description,
+        "status": TaskStatus.PENDING.value,
+        "priority": task_request.priority,
+        "due_date": datetime.fromisoformat(task_request.due_date) if task_request.due_date else None,
+        "created_by": user_id,
+        "assigned_to": user_id,
+        "created_at": now,
+        "updated_at": now
+    }
+
+def _updated_task_values(task_request: UpdateTaskRequest) -> dict:
+    """
+    Validate an update request and return only the column values that change.
+    `completed_at` is included whenever the status becomes completed; callers
+    must keep an existing completion time. Raises ValueError with a
+    client-facing message on invalid input.
+    """
+    now = datetime.utcnow()
+    values = {}
+    if task_request.title is not None:
+        values["title"] = task_request.title
+    if task_request.description is not None:
+        values["description"] = task_request.description
+    if task_request.status is not None:
+        if task_request.status not in VALID_STATUSES:
+            raise ValueError("Invalid status")
+        values["status"] = task_request.status
+        if task_request.status == TaskStatus.COMPLETED.value:
+            values["completed_at"] = now
+    if task_request.priority is not None:
+        if task_request.priority not in VALID_PRIORITIES:
+            raise ValueError("Invalid priority")
+        values["priority"] = task_request.priority
+    if task_request.due_date is not None:
+        values["due_date"] = datetime.fromisoformat(task_request.due_date) if task_request.due_date else None
+
+    values["updated_at"] = now
+    return values
+
+def _publish(session: Session, kind: str, task):
+    """
+    Queue a change event and invalidate stats for the task's owner and
+    assignee; both take effect on commit
+    """
+    users = (task.created_by, task.assigned_to)
+    task_events.publish(session, kind, _task_to_response(task).model_dump(), users)
+    mark_stale(session, users)
+
+def _task_etag(task_id, updated_at) -> str:
+    return make_etag("task", task_id, updated_at.isoformat())
+
+def _check_batch_size(count: int):
+    if count == 0:
+        raise HTTPException(status_code=400, detail="Batch is empty")
+    if count > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds maximum size of {MAX_BATCH_SIZE}")
+
 @router.get("/", response_model=TaskListResponse)
 async def get_tasks(
     current_user: dict = Depends(get_current_user),
     status: Optional[str] = Query(None, description="Filter by status"),
     priority: Optional[str] = Query(None, description="Filter by priority"),
+    q: Optional[str] = Query(None, min_length=1, max_length=200, description="Full-text search over title and description"),
+    include_archived: bool = Query(False, description="Also list completed tasks moved to the archive"),
+    due_after: Optional[datetime] = Query(None, description="Only open tasks due at or after this time"),
+    due_before: Optional[datetime] = Query(None, description="Only open tasks due before this time"),
+    overdue: bool = Query(False, description="Only open tasks past their due date"),
+    sort: Optional[str] = Query(None, description="created_at (newest first) or due_date (soonest first)"),
+    fields: Optional[str] = Query(None, description="Comma-separated task fields to return; id is always included"),
     limit: int = Query(10, ge=1, le=50, description="Number of tasks per page"),
     offset: int = Query(0, ge=0, description="Offset for pagination"),
-    session: Session = Depends(get_session)
+    if_none_match: Optional[str] = Header(None),
+    session: Session = Depends(get_read_session)
 ):
     """
-    Retrieve user's tasks with filtering and pagination
+    Retrieve user's tasks with filtering and pagination. With `q`, only
+    matching tasks are returned, most relevant first. Responses carry an
+    ETag; a matching If-None-Match gets a 304 without running the page query.
+    `include_archived` adds archived tasks, newest first (not by relevance).
+    `fields` limits the columns selected and returned, e.g. to skip the
+    description text in list views. Due-date filters never match completed
+    tasks, so they skip the archive.
     """
+    try:
+        selected = parse_task_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if sort is not None and sort not in SORT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(SORT_FIELDS)}")
+
     try:
         # Build query - removing user isolation to show all tasks
         user_id = current_user["user_id"]
-        query = select(Task)
-
-        # Apply filters
-        conditions = []
-        if status:
-            conditions.append(Task.status == status)
-        if priority:
-            conditions.append(Task.priority == priority)
-
-        if conditions:
-            query = query.where(and_(*conditions))
-
-        # Apply pagination
-        query = query.offset(offset).limit(limit).order_by(Task.created_at.desc())
-
-        tasks = session.exec(query).all()
-
-        # Debug: Log the current user ID and task count
-        print(f"DEBUG: Current user_id: {user_id}, Found {len(tasks)} tasks")
-
-        # Count total for pagination - using a scalar count query for efficiency
-        count_query = select(func.count(Task.id))
-        if conditions:
-            count_query = count_query.where(and_(*conditions))
-        total = session.exec(count_query).one()
-
-        # Convert to response format
-        task_responses = []
-        for task in tasks:
-            print(f"DEBUG: Task ID {task.id} created by {task.created_by}")  # Debug log
-            task_responses.append(TaskResponse(
-                id=task.id,
-                title=task.title,
-                description=task.description,
-                status=task.status,
-                priority=task.priority,
-                due_date=task.due_date.isoformat() if task.due_date else None,
-                created_by=task.created_by,
-                assigned_to=task.assigned_to,
-                created_at=task.created_at.isoformat(),
-                updated_at=task.updated_at.isoformat(),
-                completed_at=task.completed_at.isoformat() if task.completed_at else None
-            ))
-
-        return TaskListResponse(
-            tasks=task_responses,
-            pagination={
+        queries, params = list_queries(
+            session.get_bind().dialect.name, selected, status, priority, q, include_archived,
+            due_after, due_before, overdue, sort
+        )
+
+        # Count total for pagination. The same aggregate versions the filtered
+        # collection: every write bumps max(updated_at) except a delete, which
+        # lowers the count
+        total, last_updated = session.exec(queries.version, params=params).one()
+
+        etag = make_etag(
+            "tasks", user_id, status, priority, q, include_archived, ",".join(selected),
+            due_after.isoformat() if due_after else None, due_before.isoformat() if due_before else None,
+            overdue, sort, limit, offset, total, last_updated.isoformat() if last_updated else None
+        )
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+        rows = session.exec(queries.page, params={**params, "limit": limit, "offset": offset}).all()
+
+        # One record per request, never per row
+        logger.debug("Listed tasks", extra={"user_id": user_id, "count": len(rows), "total": total})
+
+        # Rows are encoded directly; the shape matches TaskListResponse, which
+        # stays as response_model for the OpenAPI schema only
+        return with_etag(FastJSONResponse({
+            "tasks": [task_row_to_dict(row, selected) for row in rows],
+            "pagination": {
                 "total": total,
                 "limit": limit,
                 "offset": offset,
                 "has_more": offset + limit < total
             }
-        )
+        }), etag)
     except Exception as e:
-        print(f"Error in get_tasks: {str(e)}")
+        logger.exception("Error in get_tasks")
         raise HTTPException(status_code=500, detail=f"Failed to retrieve tasks: {str(e)}")
 
+@router.get("/events")
+async def stream_task_events(
+    request: Request,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Server-sent events feed of changes to the user's tasks (created, updated,
+    completed, deleted), replacing polling of the list endpoint. A `resync`
+    event means events were dropped and the client should refetch.
+    """
+    return StreamingResponse(
+        task_events.stream(int(current_user["user_id"]), request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/changes", response_model=TaskChangesResponse)
+async def get_task_changes(
+    current_user: dict = Depends(get_current_user),
+    since: Optional[str] = Query(None, description="Cursor from a previous response; omit for a full sync"),
+    limit: int = Query(100, ge=1, le=500, description="Maximum tasks and deletions per page"),
+    # Primary only: replica lag beyond the settle window would let cursors skip rows
+    session: Session = Depends(get_session)
+):
+    """
+    Tasks created or updated and ids of tasks deleted since `since`, in commit
+    order. Apply `deleted` before `tasks`, then call again with `cursor`
+    while `has_more` is true. Changes may be delivered more than once.
+    """
+    now = datetime.utcnow()
+    if since is None:
+        cursor = SyncCursor.initial(now)
+    else:
+        try:
+            cursor = SyncCursor.decode(since)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if is_expired(cursor, now):
+            raise HTTPException(status_code=410, detail="Sync cursor has expired; perform a full sync")
+
+    # Same scope as get_tasks. Both streams are keyset scans over indexed timestamps
+    rows = session.exec(
+        select(*TASK_COLUMNS)
+        .where(after(cursor.tasks, Task.updated_at, Task.id))
+        .order_by(Task.updated_at, Task.id)
+        .limit(limit)
+    ).all()
+    tombstones = session.exec(
+        select(TaskTombstone.deleted_at, TaskTombstone.id, TaskTombstone.task_id)
+        .where(after(cursor.deleted, TaskTombstone.deleted_at, TaskTombstone.id))
+        .order_by(TaskTombstone.deleted_at, TaskTombstone.id)
+        .limit(limit)
+    ).all()
+
+    next_cursor = SyncCursor(
+        advance(cursor.tasks, (Position(row.updated_at, row.id) for row in rows), len(rows) < limit, now),
+        advance(cursor.deleted, (Position(t.deleted_at, t.id) for t in tombstones), len(tombstones) < limit, now)
+    )
+    has_more = (
+        (len(rows) == limit and next_cursor.tasks != cursor.tasks)
+        or (len(tombstones) == limit and next_cursor.deleted != cursor.deleted)
+    )
+
+    return FastJSONResponse({
+        "tasks": [task_row_to_dict(row) for row in rows],
+        "deleted": [t.task_id for t in tombstones],
+        "cursor": next_cursor.encode(),
+        "has_more": has_more
+    })
+
+@router.get("/stats", response_model=TaskStatsResponse)
+async def get_task_stats(
+    current_user: dict = Depends(get_current_user),
+    session: Session = Depends(get_session)
+):
+    """
+    Dashboard aggregates for tasks the user created or is assigned: counts by
+    status and priority, overdue count and completion-time percentiles (hours)
+    """
+    return FastJSONResponse(get_stats(session, int(current_user["user_id"])))
+
 @router.post("/", response_model=TaskResponse)
 async def create_task(
     task_request: CreateTaskRequest,
     current_user: dict = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None),
     session: Session = Depends(get_session)
 ):
     """
-    Create a new task for the authenticated user
+    Create a new task for the authenticated user. Retries sent with the same
+    Idempotency-Key get the original response instead of a duplicate task.
     """
     try:
-        # Validate priority
-        if task_request.priority not in ["low", "medium", "high", "urgent"]:
-            raise HTTPException(status_code=400, detail="Invalid priority")
-
-        # Create task
-        new_task = Task(
-            title=task_request.title,
-            description=task_request.description,
-            status="pending",  # Default status
-            priority=task_request.priority,
-            due_date=datetime.fromisoformat(task_request.due_date) if task_request.due_date else None,
-            created_by=current_user["user_id"],  # User isolation: assign to current user
-            assigned_to=current_user["user_id"],  # Assign to current user by default
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow()
-        )
+        values = _new_task_values(task_request, current_user["user_id"])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    user_id = int(current_user["user_id"])
+    if idempotency_key is not None:
+        check_key(idempotency_key)
+        fingerprint = request_fingerprint(task_request.model_dump())
+        stored = lookup_response(session, user_id, "create_task", idempotency_key)
+        # Release the connection before responding (or raising on a mismatch)
+        session.commit()
+        if stored is not None:
+            return replay(stored, fingerprint)
+
+    try:
+        # INSERT ... RETURNING gives us ids and defaults without a refresh SELECT
+        new_task = session.scalars(insert(Task).values(**values).returning(Task)).one()
+        _publish(session, "created", new_task)
+        response = _task_to_response(new_task)
+        if idempotency_key is not None:
+            # Committed with the task, so a key never outlives or predates it
+            save_response(
+                session, user_id, "create_task", idempotency_key, fingerprint, 200, dumps(response.model_dump())
+            )
+        session.commit()
 
-        session.add(new_task)
+        return response
+    except IntegrityError:
+        session.rollback()
+        if idempotency_key is None:
+            logger.exception("Error in create_task")
+            raise HTTPException(status_code=500, detail="Task creation failed")
+        # A concurrent retry with the same key committed first; its task stands
+        stored = lookup_response(session, user_id, "create_task", idempotency_key)
         session.commit()
-        session.refresh(new_task)
-
-        return TaskResponse(
-            id=new_task.id,
-            title=new_task.title,
-            description=new_task.description,
-            status=new_task.status,
-            priority=new_task.priority,
-            due_date=new_task.due_date.isoformat() if new_task.due_date else None,
-            created_by=new_task.created_by,
-            assigned_to=new_task.assigned_to,
-            created_at=new_task.created_at.isoformat(),
-            updated_at=new_task.updated_at.isoformat(),
-            completed_at=new_task.completed_at.isoformat() if new_task.completed_at else None
-        )
+        if stored is None:
+            raise HTTPException(status_code=409, detail="Request with this Idempotency-Key is being retried concurrently")
     except Exception as e:
-        print(f"Error in create_task: {str(e)}")
+        logger.exception("Error in create_task")
         raise HTTPException(status_code=500, detail=f"Task creation failed: {str(e)}")
 
+    return replay(stored, fingerprint)
+
+@router.post("/batch", response_model=BatchTaskResponse)
+async def create_tasks_batch(
+    batch_request: BatchCreateRequest,
+    current_user: dict = Depends(get_current_user),
+    session: Session = Depends(get_session)
+):
+    """
+    Create many tasks in a single transaction. Invalid items are reported in
+    `errors` by their index and do not prevent the valid ones from being created.
+    """
+    _check_batch_size(len(batch_request.tasks))
+
+    indexes = []
+    rows = []
+    errors = []
+    for index, task_request in enumerate(batch_request.tasks):
+        try:
+            rows.append(_new_task_values(task_request, current_user["user_id"]))
+            indexes.append(index)
+        except ValueError as e:
+            errors.append(BatchError(index=index, detail=str(e)))
+
+    created = []
+    if rows:
+        try:
+            # executemany with RETURNING: one round-trip per insertmanyvalues page, no refresh.
+            # Rows come back in parameter order so they line up with `indexes`.
+            created = session.scalars(
+                insert(Task).returning(Task, sort_by_parameter_order=True), rows
+            ).all()
+            for task in created:
+                _publish(session, "created", task)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.exception("Error in create_tasks_batch")
+            raise HTTPException(status_code=500, detail=f"Batch task creation failed: {str(e)}")
+
+    return BatchTaskResponse(
+        tasks=[_batch_result(index, task) for index, task in zip(indexes, created)],
+        errors=errors
+    )
+
+@router.patch("/batch", response_model=BatchTaskResponse)
+async def update_tasks_batch(
+    batch_request: BatchUpdateRequest,
+    current_user: dict = Depends(get_current_user),
+    session: Session = Depends(get_session)
+):
+    """
+    Update many tasks in a single transaction. Missing tasks and invalid items
+    are reported in `errors` by their index.
+    """
+    _check_batch_size(len(batch_request.tasks))
+
+    errors = []
+    valid = []
+    for index, item in enumerate(batch_request.tasks):
+        try:
+            valid.append((index, item, _updated_task_values(item)))
+        except ValueError as e:
+            errors.append(BatchError(index=index, id=item.id, detail=str(e)))
+
+    # One lookup for every referenced task instead of a get per item
+    ids = {item.id for _, item, _ in valid}
+    existing = dict(session.exec(
+        select(Task.id, Task.completed_at).where(Task.id.in_(ids))
+    ).all()) if ids else {}
+    if len(existing) < len(ids):
+        # Archived tasks are moved back to p2_tasks so they can be changed;
+        # only for valid items, so rejected ones leave the archive untouched
+        for row in restore_archived(session, ids - existing.keys()):
+            existing[row.id] = row.completed_at
+
+    indexes = []
+    rows = []
+    for index, item, values in valid:
+        if item.id not in existing:
+            errors.append(BatchError(index=index, id=item.id, detail="Task not found"))
+            continue
+        if "completed_at" in values:
+            # Keep the original completion time if the task was already completed
+            if existing[item.id]:
+                del values["completed_at"]
+            else:
+                existing[item.id] = values["completed_at"]
+        rows.append({"id": item.id, **values})
+        indexes.append(index)
+
+    updated = {}
+    if rows:
+        try:
+            # ORM bulk UPDATE by primary key, executed as executemany
+            session.execute(update(Task), rows)
+            updated_ids = {row["id"] for row in rows}
+            updated = {task.id: task for task in session.exec(select(Task).where(Task.id.in_(updated_ids)))}
+            for task in updated.values():
+                _publish(session, "updated", task)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.exception("Error in update_tasks_batch")
+            raise HTTPException(status_code=500, detail=f"Batch task update failed: {str(e)}")
+
+    return BatchTaskResponse(
+        tasks=[_batch_result(index, updated[row["id"]]) for index, row in zip(indexes, rows)],
+        errors=sorted(errors, key=lambda error: error.index)
+    )
+
+@router.delete("/batch", response_model=BatchDeleteResponse)
+async def delete_tasks_batch(
+    batch_request: BatchDeleteRequest,
+    current_user: dict = Depends(get_current_user),
+    session: Session = Depends(get_session)
+):
+    """
+    Delete many tasks in a single statement. IDs that do not exist are reported in `errors`.
+    """
+    _check_batch_size(len(batch_request.ids))
+
+    try:
+        ids = set(batch_request.ids)
+        deleted_rows = session.execute(
+            delete(Task)
+            .where(Task.id.in_(ids))
+            .returning(Task.id, Task.created_by, Task.assigned_to)
+            .execution_options(synchronize_session=False)
+        ).all()
+        missing = ids.difference(row.id for row in deleted_rows)
+        if missing:
+            deleted_rows += session.execute(
+                delete(ArchivedTask)
+                .where(ArchivedTask.id.in_(missing))
+                .returning(ArchivedTask.id, ArchivedTask.created_by, ArchivedTask.assigned_to)
+                .execution_options(synchronize_session=False)
+            ).all()
+        for task_id, created_by, assigned_to in deleted_rows:
+            task_events.publish(session, "deleted", {"id": task_id}, (created_by, assigned_to))
+            mark_stale(session, (created_by, assigned_to))
+        record_deletions(session, [row.id for row in deleted_rows])
+        session.commit()
+        deleted = {row.id for row in deleted_rows}
+    except Exception as e:
+        session.rollback()
+        logger.exception("Error in delete_tasks_batch")
+        raise HTTPException(status_code=500, detail=f"Batch task deletion failed: {str(e)}")
+
+    errors = [
+        BatchError(index=index, id=task_id, detail="Task not found")
+        for index, task_id in enumerate(batch_request.ids)
+        if task_id not in deleted
+    ]
+
+    return BatchDeleteResponse(deleted=sorted(deleted), errors=errors)
+
 @router.get("/{task_id}", response_model=TaskResponse)
 async def get_task(
     task_id: int,
     current_user: dict = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    if_none_match: Optional[str] = Header(None),
+    session: Session = Depends(get_read_session)
 ):
     """
-    Retrieve a specific task by ID
+    Retrieve a specific task by ID, active or archived. Revalidation with
+    If-None-Match only reads updated_at and returns 304 if the task hasn't changed.
     """
-    task = session.get(Task, task_id)
-
-    if not task:
+    if if_none_match:
+        updated_at = session.exec(select(Task.updated_at).where(Task.id == task_id)).first()
+        if updated_at is None:
+            updated_at = session.exec(select(ArchivedTask.updated_at).where(ArchivedTask.id == task_id)).first()
+        if updated_at is None:
+            raise HTTPException(status_code=404, detail="Task not found")
+        etag = _task_etag(task_id, updated_at)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+    row = session.exec(select(*TASK_COLUMNS).where(Task.id == task_id)).first()
+    if not row:
+        # Archived tasks stay readable by id; writes move them back first
+        row = session.exec(select(*ARCHIVED_TASK_COLUMNS).where(ArchivedTask.id == task_id)).first()
+
+    if not row:
         raise HTTPException(status_code=404, detail="Task not found")
 
-
-    return TaskResponse(
-        id=task.id,
-        title=task.title,
-        description=task.description,
-        status=task.status,
-        priority=task.priority,
-        due_date=task.due_date.isoformat() if task.due_date else None,
-        created_by=task.created_by,
-        assigned_to=task.assigned_to,
-        created_at=task.created_at.isoformat(),
-        updated_at=task.updated_at.isoformat(),
-        completed_at=task.completed_at.isoformat() if task.completed_at else None
-    )
+    task = task_row_to_dict(row)
+    return with_etag(FastJSONResponse(task), _task_etag(task["id"], task["updated_at"]))
 
 @router.put("/{task_id}", response_model=TaskResponse)
 async def update_task(
@@ -199,53 +606,31 @@ async def update_task(
     session: Session = Depends(get_session)
 ):
     """
-    Update a specific task by ID
+    Update a specific task by ID. An archived task is moved back to the
+    active tasks first.
     """
-    task = session.get(Task, task_id)
+    try:
+        values = _updated_task_values(task_request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
+    if "completed_at" in values:
+        # Keep the original completion time if the task was already completed
+        values["completed_at"] = func.coalesce(Task.completed_at, values["completed_at"])
 
+    # Single UPDATE ... RETURNING replaces get + flush + refresh
+    statement = update(Task).where(Task.id == task_id).values(**values).returning(Task)
+    task = session.scalars(statement).one_or_none()
+    if not task and restore_archived(session, [task_id]):
+        task = session.scalars(statement).one_or_none()
 
-    # Update fields if provided
-    if task_request.title is not None:
-        task.title = task_request.title
-    if task_request.description is not None:
-        task.description = task_request.description
-    if task_request.status is not None:
-        # Validate status
-        if task_request.status not in ["pending", "in_progress", "completed"]:
-            raise HTTPException(status_code=400, detail="Invalid status")
-        task.status = task_request.status
-        # Set completed_at if status is completed
-        if task_request.status == "completed" and not task.completed_at:
-            task.completed_at = datetime.utcnow()
-    if task_request.priority is not None:
-        # Validate priority
-        if task_request.priority not in ["low", "medium", "high", "urgent"]:
-            raise HTTPException(status_code=400, detail="Invalid priority")
-        task.priority = task_request.priority
-    if task_request.due_date is not None:
-        task.due_date = datetime.fromisoformat(task_request.due_date) if task_request.due_date else None
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
 
-    task.updated_at = datetime.utcnow()
-    session.add(task)
+    _publish(session, "updated", task)
     session.commit()
-    session.refresh(task)
 
-    return TaskResponse(
-        id=task.id,
-        title=task.title,
-        description=task.description,
-        status=task.status,
-        priority=task.priority,
-        due_date=task.due_date.isoformat() if task.due_date else None,
-        created_by=task.created_by,
-        assigned_to=task.assigned_to,
-        created_at=task.created_at.isoformat(),
-        updated_at=task.updated_at.isoformat(),
-        completed_at=task.completed_at.isoformat() if task.completed_at else None
-    )
+    return _task_to_response(task)
 
 @router.delete("/{task_id}")
 async def delete_task(
@@ -254,15 +639,28 @@ async def delete_task(
     session: Session = Depends(get_session)
 ):
     """
-    Delete a specific task by ID
+    Delete a specific task by ID, active or archived
     """
-    task = session.get(Task, task_id)
-
-    if not task:
+    deleted = session.execute(
+        delete(Task)
+        .where(Task.id == task_id)
+        .returning(Task.id, Task.created_by, Task.assigned_to)
+        .execution_options(synchronize_session=False)
+    ).one_or_none()
+    if deleted is None:
+        deleted = session.execute(
+            delete(ArchivedTask)
+            .where(ArchivedTask.id == task_id)
+            .returning(ArchivedTask.id, ArchivedTask.created_by, ArchivedTask.assigned_to)
+            .execution_options(synchronize_session=False)
+        ).one_or_none()
+
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Task not found")
 
-
-    session.delete(task)
+    task_events.publish(session, "deleted", {"id": deleted.id}, (deleted.created_by, deleted.assigned_to))
+    mark_stale(session, (deleted.created_by, deleted.assigned_to))
+    record_deletions(session, [deleted.id])
     session.commit()
 
     return {"success": True, "message": "Task deleted successfully"}
@@ -274,32 +672,24 @@ async def complete_task(
     session: Session = Depends(get_session)
 ):
     """
-    Mark a task as completed
+    Mark a task as completed. An archived task is moved back to the active
+    tasks first.
     """
-    task = session.get(Task, task_id)
+    now = datetime.utcnow()
+    statement = (
+        update(Task)
+        .where(Task.id == task_id)
+        .values(status=TaskStatus.COMPLETED.value, completed_at=now, updated_at=now)
+        .returning(Task)
+    )
+    task = session.scalars(statement).one_or_none()
+    if not task and restore_archived(session, [task_id]):
+        task = session.scalars(statement).one_or_none()
 
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
 
-
-    task.status = "completed"
-    task.completed_at = datetime.utcnow()
-    task.updated_at = datetime.utcnow()
-
-    session.add(task)
+    _publish(session, "completed", task)
     session.commit()
-    session.refresh(task)
 
-    return TaskResponse(
-        id=task.id,
-        title=task.title,
-        description=task.description,
-        status=task.status,
-        priority=task.priority,
-        due_date=task.due_date.isoformat() if task.due_date else None,
-        created_by=task.created_by,
-        assigned_to=task.assigned_to,
-        created_at=task.created_at.isoformat(),
-        updated_at=task.updated_at.isoformat(),
-        completed_at=task.completed_at.isoformat() if task.completed_at else None
-    )
\ No newline at end of file
+    return _task_to_response(task)
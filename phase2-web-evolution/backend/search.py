@@ -0,0 +1,134 @@
+import re
+from typing import List, Optional, Sequence, Union
+from sqlalchemy import column, false, func, inspect, literal_column, or_, table, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.elements import BindParameter
+from models import ArchivedTask, Task
+
+# Text search configuration for the Postgres tsvector; the migration and
+# ensure_search_index() must build the column with the same one
+SEARCH_CONFIG = "english"
+
+# Title matches outrank description matches
+_PG_VECTOR_DDL = (
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B')"
+)
+
+_SQLITE_FTS_DDL = [
+    # External-content FTS5 table: the index only, rows stay in p2_tasks
+    """CREATE VIRTUAL TABLE IF NOT EXISTS p2_tasks_fts USING fts5(
+        title, description, content='p2_tasks', content_rowid='id', tokenize='porter unicode61'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS p2_tasks_fts_ai AFTER INSERT ON p2_tasks BEGIN
+        INSERT INTO p2_tasks_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS p2_tasks_fts_ad AFTER DELETE ON p2_tasks BEGIN
+        INSERT INTO p2_tasks_fts(p2_tasks_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    # Only text edits touch the index; status changes don't
+    """CREATE TRIGGER IF NOT EXISTS p2_tasks_fts_au AFTER UPDATE OF title, description ON p2_tasks BEGIN
+        INSERT INTO p2_tasks_fts(p2_tasks_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO p2_tasks_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+]
+
+_search_vector = literal_column("p2_tasks.search_vector")
+_fts_table = table("p2_tasks_fts", column("rowid"))
+# FTS5 exposes the table name as a hidden column for MATCH and bm25()
+_fts = literal_column("p2_tasks_fts")
+
+
+def ensure_search_index(connection: Connection):
+    """
+    Create the full-text index if the schema was built by create_all rather
+    than migrations. A no-op when it already exists.
+    """
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        columns = {c["name"] for c in inspect(connection).get_columns("p2_tasks")}
+        if "search_vector" not in columns:
+            connection.execute(text(
+                f"ALTER TABLE p2_tasks ADD COLUMN search_vector tsvector "
+                f"GENERATED ALWAYS AS ({_PG_VECTOR_DDL}) STORED"
+            ))
+        connection.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_p2_tasks_search_vector ON p2_tasks USING gin (search_vector)"
+        ))
+    elif dialect == "sqlite":
+        exists = connection.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'p2_tasks_fts'"
+        )).first()
+        for statement in _SQLITE_FTS_DDL:
+            connection.execute(text(statement))
+        if not exists:
+            # Index rows written before the FTS table existed
+            connection.execute(text("INSERT INTO p2_tasks_fts(p2_tasks_fts) VALUES ('rebuild')"))
+
+
+def _fts5_query(q: str) -> str:
+    # Quote each word so user input can't use (or break on) FTS5 query syntax
+    words = re.findall(r"\w+", q)
+    return " ".join(f'"{word}"' for word in words)
+
+
+def search_term(q: str, dialect: str) -> Optional[str]:
+    """The value matched against for `q`, or None if `q` has nothing to match"""
+    if dialect == "postgresql":
+        return q
+    if dialect == "sqlite":
+        return _fts5_query(q) or None
+    return f"%{q}%"
+
+
+def apply_search(query: Select, q: Union[str, BindParameter], dialect: str, ranked: bool = True) -> Select:
+    """
+    Restrict a select over p2_tasks to rows matching `q`, most relevant first
+    if `ranked`. Uses the Postgres GIN index or SQLite FTS5, and falls back to
+    a substring scan elsewhere. `q` may instead be a bind parameter for
+    search_term(q), so the statement can be built once and reused.
+    """
+    if isinstance(q, str):
+        term = search_term(q, dialect)
+        if term is None:
+            return query.where(false())
+    else:
+        term = q
+
+    if dialect == "postgresql":
+        tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, term)
+        query = query.where(_search_vector.op("@@")(tsquery))
+        if ranked:
+            query = query.order_by(func.ts_rank_cd(_search_vector, tsquery).desc())
+        return query
+
+    if dialect == "sqlite":
+        query = query.join(_fts_table, _fts_table.c.rowid == Task.id)
+        query = query.where(_fts.op("MATCH")(term))
+        if ranked:
+            # bm25 is lower-is-better; weights mirror the Postgres A/B ranks
+            query = query.order_by(func.bm25(_fts, 4.0, 1.0))
+        return query
+
+    return query.where(or_(Task.title.ilike(term), Task.description.ilike(term)))
+
+
+def archive_search_patterns(q: str) -> List[str]:
+    """ILIKE patterns for apply_archive_search, one per word of `q`"""
+    return [f"%{word}%" for word in re.findall(r"\w+", q)]
+
+
+def apply_archive_search(query: Select, patterns: Sequence[Union[str, BindParameter]]) -> Select:
+    """
+    Restrict a select over p2_tasks_archive to rows containing every pattern
+    from archive_search_patterns (or bind parameters for them). The archive
+    has no full-text index; it's only searched on request.
+    """
+    if not patterns:
+        return query.where(false())
+    for pattern in patterns:
+        query = query.where(or_(ArchivedTask.title.ilike(pattern), ArchivedTask.description.ilike(pattern)))
+    return query
@@ -0,0 +1,78 @@
+import json
+from typing import Any, Optional
+from fastapi.responses import Response
+from models import Task
+
+# orjson is optional: it serializes datetimes natively and is several times
+# faster than the stdlib encoder, but the API works without it
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Columns fetched for task responses; selecting them directly returns plain
+# rows and skips ORM identity-map bookkeeping for read-only endpoints
+TASK_COLUMNS = (
+    Task.id,
+    Task.title,
+    Task.description,
+    Task.status,
+    Task.priority,
+    Task.due_date,
+    Task.created_by,
+    Task.assigned_to,
+    Task.created_at,
+    Task.updated_at,
+    Task.completed_at,
+)
+
+TASK_FIELDS = tuple(column.key for column in TASK_COLUMNS)
+
+
+def parse_task_fields(fields: Optional[str]) -> tuple:
+    """
+    Parse a comma-separated `fields` parameter into task field names, in
+    TASK_FIELDS order with `id` always included. None or blank selects every
+    field. Raises ValueError with a client-facing message on unknown fields.
+    """
+    if not fields or not fields.strip():
+        return TASK_FIELDS
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested.difference(TASK_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    requested.add("id")
+    return tuple(field for field in TASK_FIELDS if field in requested)
+
+
+def task_row_to_dict(row, fields: tuple = TASK_FIELDS) -> dict:
+    """
+    Map a row selected with TASK_COLUMNS (or the columns for `fields`) to a
+    response dict. Datetimes are left as-is and formatted by the encoder.
+    """
+    return dict(zip(fields, row))
+
+
+def _default(value: Any):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """
+    JSON response that encodes plain dicts directly. Returning it from an
+    endpoint bypasses FastAPI's response_model validation, so the content
+    must already match the declared schema.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
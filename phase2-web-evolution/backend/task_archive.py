@@ -0,0 +1,84 @@
+import os
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from sqlmodel import Session, select
+from sqlalchemy import delete, insert
+from models import ArchivedTask, Task, TaskStatus
+from db import engine
+from background import register_job
+from serialization import TASK_COLUMNS, TASK_FIELDS
+from logging_config import get_logger
+
+# Load environment variables
+load_dotenv()
+
+logger = get_logger(__name__)
+
+# Tasks completed longer ago than this move to p2_tasks_archive, keeping the
+# table every list and count query scans small
+TASK_ARCHIVE_AFTER = timedelta(days=float(os.getenv("TASK_ARCHIVE_AFTER_DAYS", "90")))
+# 0 disables the job
+TASK_ARCHIVE_INTERVAL = float(os.getenv("TASK_ARCHIVE_INTERVAL", "3600"))
+# Each batch is its own short transaction, so row locks are held briefly
+TASK_ARCHIVE_BATCH_SIZE = int(os.getenv("TASK_ARCHIVE_BATCH_SIZE", "1000"))
+TASK_ARCHIVE_MAX_BATCHES = int(os.getenv("TASK_ARCHIVE_MAX_BATCHES", "50"))
+
+# Same order as TASK_COLUMNS, so rows from either table map with task_row_to_dict
+ARCHIVED_TASK_COLUMNS = tuple(getattr(ArchivedTask, field) for field in TASK_FIELDS)
+
+
+def _archive_batch(session: Session, cutoff: datetime, now: datetime) -> int:
+    completed = Task.status == TaskStatus.COMPLETED.value
+    batch = (
+        select(Task.id)
+        .where(completed, Task.completed_at < cutoff)
+        .order_by(Task.completed_at)
+        .limit(TASK_ARCHIVE_BATCH_SIZE)
+    )
+    # Status is checked again so a task reopened meanwhile stays put
+    rows = session.execute(
+        delete(Task)
+        .where(Task.id.in_(batch), completed)
+        .returning(*TASK_COLUMNS)
+        .execution_options(synchronize_session=False)
+    ).all()
+    if rows:
+        session.execute(insert(ArchivedTask), [
+            {**dict(zip(TASK_FIELDS, row)), "archived_at": now} for row in rows
+        ])
+    session.commit()
+    return len(rows)
+
+
+def restore_archived(session: Session, task_ids) -> list:
+    """
+    Move archived tasks back into p2_tasks, keeping their ids, so they can be
+    changed again; committed by the caller. Returns the restored rows.
+    """
+    rows = session.execute(
+        delete(ArchivedTask)
+        .where(ArchivedTask.id.in_(set(task_ids)))
+        .returning(*ARCHIVED_TASK_COLUMNS)
+        .execution_options(synchronize_session=False)
+    ).all()
+    if rows:
+        session.execute(insert(Task), [dict(zip(TASK_FIELDS, row)) for row in rows])
+    return rows
+
+
+def archive_completed_tasks() -> int:
+    """Move tasks completed before the cutoff into the archive, in batches"""
+    now = datetime.utcnow()
+    cutoff = now - TASK_ARCHIVE_AFTER
+    archived = 0
+    for _ in range(TASK_ARCHIVE_MAX_BATCHES):
+        with Session(engine) as session:
+            moved = _archive_batch(session, cutoff, now)
+        archived += moved
+        if moved < TASK_ARCHIVE_BATCH_SIZE:
+            break
+    logger.info("Archived completed tasks", extra={"archived": archived})
+    return archived
+
+
+register_job("archive_completed_tasks", TASK_ARCHIVE_INTERVAL, archive_completed_tasks)
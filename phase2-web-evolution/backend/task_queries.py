@@ -0,0 +1,162 @@
+import os
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+from dotenv import load_dotenv
+from sqlmodel import select, and_
+from sqlalchemy import bindparam, false, func, literal_column, union_all
+from sqlalchemy.sql import Select
+from models import ArchivedTask, Task, TaskStatus
+from search import apply_search, apply_archive_search, archive_search_patterns, search_term
+
+# Load environment variables
+load_dotenv()
+
+# Distinct list statements kept built. SQLAlchemy caches compiled SQL by
+# statement structure, but building the select and deriving that cache key
+# still costs more per request than running the query; a statement reused
+# here pays both once.
+TASK_QUERY_CACHE_SIZE = int(os.getenv("TASK_QUERY_CACHE_SIZE", "256"))
+
+SORT_FIELDS = ("created_at", "due_date")
+
+# Matches ix_p2_tasks_due_date_open's predicate; a bound value wouldn't let
+# the planner prove the partial index applies
+_open = Task.status != literal_column(f"'{TaskStatus.COMPLETED.value}'")
+
+
+class ListShape(NamedTuple):
+    """Everything about a list request that changes its SQL, but no values"""
+    dialect: str
+    fields: tuple
+    status: bool
+    priority: bool
+    due_after: bool
+    due_before: bool
+    overdue: bool
+    search: Optional[bool]  # None without `q`; False when `q` has nothing to match
+    archive_words: Optional[int]  # None unless archived tasks are included
+    sort: Optional[str]  # None for relevance with `q`, else newest first
+
+
+class ListQueries(NamedTuple):
+    version: Select  # (count, max(updated_at)) of the filtered collection
+    page: Select  # One page of `fields` in the requested order
+
+
+def _conditions(model, shape: ListShape) -> list:
+    conditions = []
+    if shape.status:
+        conditions.append(model.status == bindparam("status"))
+    if shape.priority:
+        conditions.append(model.priority == bindparam("priority"))
+    return conditions
+
+
+def _due_conditions(shape: ListShape) -> list:
+    """Due-date filters, which only match open tasks"""
+    conditions = []
+    if shape.due_after:
+        conditions.append(Task.due_date >= bindparam("due_after"))
+    if shape.due_before:
+        conditions.append(Task.due_date < bindparam("due_before"))
+    if shape.overdue:
+        conditions.append(Task.due_date < bindparam("now"))
+    if conditions:
+        conditions.append(_open)
+    return conditions
+
+
+def _filtered(query: Select, conditions: list) -> Select:
+    return query.where(and_(*conditions)) if conditions else query
+
+
+@lru_cache(maxsize=TASK_QUERY_CACHE_SIZE)
+def build_list_queries(shape: ListShape) -> ListQueries:
+    """Statements for a list shape, with bind parameters for every value"""
+    conditions = _conditions(Task, shape) + _due_conditions(shape)
+    branch_fields = shape.fields
+    if shape.archive_words is not None:
+        # The union is sorted and versioned outside its branches, so both
+        # carry those columns even when they aren't returned
+        branch_fields += tuple(field for field in ("updated_at", *SORT_FIELDS) if field not in shape.fields)
+
+    query = _filtered(select(*(getattr(Task, field) for field in branch_fields)), conditions)
+    version = _filtered(select(func.count(Task.id), func.max(Task.updated_at)), conditions)
+    if shape.search is False:
+        query = query.where(false())
+        version = version.where(false())
+    elif shape.search:
+        version = apply_search(version, bindparam("search"), shape.dialect, ranked=False)
+        # Ranking can't be ordered inside a UNION branch
+        query = apply_search(
+            query, bindparam("search"), shape.dialect, ranked=shape.archive_words is None and shape.sort is None
+        )
+
+    if shape.archive_words is None:
+        columns = Task
+    else:
+        archived = _filtered(
+            select(*(getattr(ArchivedTask, field) for field in branch_fields)), _conditions(ArchivedTask, shape)
+        )
+        if shape.search is not None:
+            archived = apply_archive_search(
+                archived, [bindparam(f"word_{i}") for i in range(shape.archive_words)]
+            )
+        tasks = union_all(query, archived).subquery("tasks")
+        query = select(*(tasks.c[field] for field in shape.fields))
+        version = select(func.count(), func.max(tasks.c.updated_at)).select_from(tasks)
+        columns = tasks.c
+
+    if shape.sort == "due_date":
+        # Soonest first; tasks without a due date last
+        query = query.order_by(columns.due_date.asc().nulls_last())
+    page = query.order_by(columns.created_at.desc()).offset(bindparam("offset")).limit(bindparam("limit"))
+    return ListQueries(version, page)
+
+
+def _naive_utc(value: datetime) -> datetime:
+    # Task datetimes are stored as naive UTC
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def list_queries(
+    dialect: str, fields: tuple, status: Optional[str], priority: Optional[str], q: Optional[str],
+    include_archived: bool, due_after: Optional[datetime] = None, due_before: Optional[datetime] = None,
+    overdue: bool = False, sort: Optional[str] = None
+) -> Tuple[ListQueries, dict]:
+    """
+    Cached statements for a list request and the parameters to run them
+    with. `limit` and `offset` are left for the caller to add to the page
+    query's parameters.
+    """
+    params = {}
+    if status:
+        params["status"] = status
+    if priority:
+        params["priority"] = priority
+    if due_after:
+        params["due_after"] = _naive_utc(due_after)
+    if due_before:
+        params["due_before"] = _naive_utc(due_before)
+    if overdue:
+        params["now"] = datetime.utcnow()
+    search = None
+    if q:
+        term = search_term(q, dialect)
+        search = term is not None
+        if search:
+            params["search"] = term
+    archive_words = None
+    # Archived tasks are all completed, so due-date filters never match them
+    if include_archived and not (due_after or due_before or overdue):
+        patterns = archive_search_patterns(q) if q else []
+        archive_words = len(patterns)
+        params.update((f"word_{i}", pattern) for i, pattern in enumerate(patterns))
+    shape = ListShape(
+        dialect, fields, bool(status), bool(priority), bool(due_after), bool(due_before), overdue,
+        search, archive_words, sort
+    )
+    return build_list_queries(shape), params
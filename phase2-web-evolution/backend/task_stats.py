@@ -0,0 +1,148 @@
+import json
+import math
+import os
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional
+from dotenv import load_dotenv
+from sqlmodel import Session, select
+from sqlalchemy import event, extract, func, or_, union_all, update
+from sqlalchemy.exc import IntegrityError
+from models import ArchivedTask, Task, TaskStatus, TaskPriority, TaskStatsSummary
+from serialization import dumps
+
+# Load environment variables
+load_dotenv()
+
+# Serve stats from the p2_task_stats summary table, recomputing only after a
+# write or when older than TASK_STATS_TTL (overdue counts change with time)
+TASK_STATS_SUMMARY = os.getenv("TASK_STATS_SUMMARY", "false").lower() in ("1", "true", "yes")
+TASK_STATS_TTL = timedelta(seconds=float(os.getenv("TASK_STATS_TTL", "60")))
+
+PERCENTILES = (0.5, 0.9, 0.99)
+
+_STALE_KEY = "stale_task_stats_users"
+
+
+def _owned_by(model, user_id: int):
+    return or_(model.created_by == user_id, model.assigned_to == user_id)
+
+
+def _user_tasks(user_id: int):
+    """The user's active and archived tasks, so archiving doesn't change stats"""
+    return union_all(*(
+        select(model.status, model.priority, model.due_date, model.created_at, model.completed_at)
+        .where(_owned_by(model, user_id))
+        for model in (Task, ArchivedTask)
+    )).subquery("tasks")
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    """Linear interpolation between closest ranks, like percentile_cont"""
+    position = (len(values) - 1) * fraction
+    lower = math.floor(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def _completion_hours(values: dict) -> dict:
+    return {key: round(float(value), 2) if value is not None else None for key, value in values.items()}
+
+
+def compute_stats(session: Session, user_id: int, now: datetime) -> dict:
+    """
+    Counts by status and priority, overdue count and completion-time
+    percentiles for the user's tasks, archived ones included. One aggregate
+    query on Postgres; other databases lack percentile_cont, so durations are
+    fetched separately.
+    """
+    statuses = [s.value for s in TaskStatus]
+    priorities = [p.value for p in TaskPriority]
+    is_postgres = session.get_bind().dialect.name == "postgresql"
+    tasks = _user_tasks(user_id)
+    hours = extract("epoch", tasks.c.completed_at - tasks.c.created_at) / 3600
+
+    columns = [func.count()]
+    columns += [func.count().filter(tasks.c.status == status) for status in statuses]
+    columns += [func.count().filter(tasks.c.priority == priority) for priority in priorities]
+    columns.append(func.count().filter(
+        tasks.c.due_date < now, tasks.c.status != TaskStatus.COMPLETED.value
+    ))
+    if is_postgres:
+        # NULL durations (incomplete tasks) are ignored by both aggregates
+        columns.append(func.avg(hours))
+        columns += [func.percentile_cont(fraction).within_group(hours) for fraction in PERCENTILES]
+
+    row = list(session.exec(select(*columns).select_from(tasks)).one())
+    total = row.pop(0)
+    by_status = dict(zip(statuses, row[:len(statuses)]))
+    row = row[len(statuses):]
+    by_priority = dict(zip(priorities, row[:len(priorities)]))
+    overdue = row[len(priorities)]
+
+    if is_postgres:
+        mean, *percentiles = row[len(priorities) + 1:]
+    else:
+        durations = sorted(
+            (completed_at - created_at).total_seconds() / 3600
+            for created_at, completed_at in session.exec(
+                select(tasks.c.created_at, tasks.c.completed_at).where(tasks.c.completed_at.is_not(None))
+            )
+        )
+        mean = sum(durations) / len(durations) if durations else None
+        percentiles = [_percentile(durations, fraction) if durations else None for fraction in PERCENTILES]
+
+    completion = {"mean": mean}
+    completion.update({f"p{round(fraction * 100)}": value for fraction, value in zip(PERCENTILES, percentiles)})
+
+    return {
+        "total": total,
+        "by_status": by_status,
+        "by_priority": by_priority,
+        "overdue": overdue,
+        "completion_hours": _completion_hours(completion),
+        "generated_at": now.isoformat()
+    }
+
+
+def get_stats(session: Session, user_id: int) -> dict:
+    now = datetime.utcnow()
+    if TASK_STATS_SUMMARY:
+        summary = session.get(TaskStatsSummary, user_id)
+        if summary is not None and not summary.stale and now - summary.computed_at < TASK_STATS_TTL:
+            return json.loads(summary.payload)
+
+    stats = compute_stats(session, user_id, now)
+
+    if TASK_STATS_SUMMARY:
+        session.merge(TaskStatsSummary(
+            user_id=user_id, payload=dumps(stats).decode("utf-8"), computed_at=now, stale=False
+        ))
+        try:
+            session.commit()
+        except IntegrityError:
+            # Another request stored the summary first; either copy is fine
+            session.rollback()
+    return stats
+
+
+def mark_stale(session: Session, user_ids: Iterable[Optional[int]]):
+    """Invalidate summaries of users whose tasks changed; applied when `session` commits"""
+    if TASK_STATS_SUMMARY:
+        session.info.setdefault(_STALE_KEY, set()).update(
+            user_id for user_id in user_ids if user_id is not None
+        )
+
+
+@event.listens_for(Session, "before_commit")
+def _flush_stale(session):
+    user_ids = session.info.pop(_STALE_KEY, None)
+    if user_ids:
+        # One statement per transaction, however many tasks a batch touched
+        session.execute(
+            update(TaskStatsSummary).where(TaskStatsSummary.user_id.in_(user_ids)).values(stale=True)
+        )
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_stale(session):
+    session.info.pop(_STALE_KEY, None)
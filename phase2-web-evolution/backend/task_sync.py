@@ -0,0 +1,109 @@
+import base64
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Iterable, NamedTuple, Optional
+from dotenv import load_dotenv
+from sqlmodel import Session
+from sqlalchemy import and_, or_, delete, insert
+from models import TaskTombstone
+from db import engine
+from background import register_job
+from logging_config import get_logger
+
+# Load environment variables
+load_dotenv()
+
+logger = get_logger(__name__)
+
+# Deletions older than this are forgotten; clients with an older cursor must resync fully
+TASK_TOMBSTONE_RETENTION = timedelta(days=float(os.getenv("TASK_TOMBSTONE_RETENTION_DAYS", "30")))
+TASK_TOMBSTONE_SWEEP_INTERVAL = float(os.getenv("TASK_TOMBSTONE_SWEEP_INTERVAL", "3600"))
+# Timestamps are taken before commit, so a slow transaction can become visible
+# with a time earlier than rows already synced. Cursors never move past
+# now - SYNC_SETTLE_SECONDS; changes newer than that may be sent twice.
+SYNC_SETTLE = timedelta(seconds=float(os.getenv("SYNC_SETTLE_SECONDS", "2")))
+
+
+class Position(NamedTuple):
+    """Keyset position (timestamp, id) within one change stream"""
+    at: datetime
+    id: int
+
+
+class SyncCursor(NamedTuple):
+    tasks: Position
+    deleted: Position
+
+    def encode(self) -> str:
+        raw = json.dumps([
+            self.tasks.at.isoformat(), self.tasks.id,
+            self.deleted.at.isoformat(), self.deleted.id
+        ], separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+    @classmethod
+    def decode(cls, value: str) -> "SyncCursor":
+        """Raises ValueError for anything that isn't a cursor we issued"""
+        try:
+            raw = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+            tasks_at, tasks_id, deleted_at, deleted_id = json.loads(raw)
+            return cls(
+                Position(datetime.fromisoformat(tasks_at), int(tasks_id)),
+                Position(datetime.fromisoformat(deleted_at), int(deleted_id))
+            )
+        except Exception:
+            raise ValueError("Invalid sync cursor")
+
+    @classmethod
+    def initial(cls, now: datetime) -> "SyncCursor":
+        # A first sync downloads every task; deletions before it are irrelevant
+        return cls(Position(datetime.min, 0), Position(now - SYNC_SETTLE, 0))
+
+
+def after(position: Position, at_column, id_column):
+    """WHERE clause for rows strictly after a keyset position"""
+    return or_(at_column > position.at, and_(at_column == position.at, id_column > position.id))
+
+
+def advance(position: Position, rows: Iterable[Position], exhausted: bool, now: datetime) -> Position:
+    """
+    Move a position to the last row that is old enough to be settled. If the
+    stream was read to the end, nothing settled remains before the horizon,
+    so an idle cursor still moves forward (and doesn't expire).
+    """
+    horizon = now - SYNC_SETTLE
+    for row in rows:
+        if row.at > horizon:
+            break
+        position = row
+    if exhausted and position.at < horizon:
+        position = Position(horizon, 0)
+    return position
+
+
+def is_expired(cursor: SyncCursor, now: datetime) -> bool:
+    """True if tombstones the cursor still needs may already have been pruned"""
+    return cursor.deleted.at < now - TASK_TOMBSTONE_RETENTION
+
+
+def record_deletions(session: Session, task_ids: Iterable[int], deleted_at: Optional[datetime] = None):
+    """Write tombstones for deleted tasks; committed by the caller"""
+    deleted_at = deleted_at or datetime.utcnow()
+    rows = [{"task_id": task_id, "deleted_at": deleted_at} for task_id in task_ids]
+    if rows:
+        session.execute(insert(TaskTombstone), rows)
+
+
+def prune_tombstones() -> int:
+    cutoff = datetime.utcnow() - TASK_TOMBSTONE_RETENTION
+    with Session(engine) as session:
+        deleted = session.execute(
+            delete(TaskTombstone).where(TaskTombstone.deleted_at < cutoff)
+        ).rowcount
+        session.commit()
+    logger.info("Pruned task tombstones", extra={"deleted": deleted})
+    return deleted
+
+
+register_job("prune_task_tombstones", TASK_TOMBSTONE_SWEEP_INTERVAL, prune_tombstones)
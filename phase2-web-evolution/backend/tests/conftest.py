@@ -0,0 +1,34 @@
+import os
+import sys
+import tempfile
+import uuid
+
+# Settings are read at import time, so they are set before the app is imported
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test.db"
+os.environ["DATABASE_REPLICA_URLS"] = ""
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+os.environ["SCHEMA_SETUP"] = "create_all"
+os.environ["LOG_LEVEL"] = "WARNING"
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def auth_headers(client):
+    """Headers for a newly registered user"""
+    name = uuid.uuid4().hex[:12]
+    response = client.post("/api/v1/auth/register", json={
+        "email": f"{name}@example.com", "username": name, "password": "correct horse battery"
+    })
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['tokens']['access_token']}"}
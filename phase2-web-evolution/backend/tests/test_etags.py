@@ -0,0 +1,49 @@
+def test_single_task_revalidates_with_304(client, auth_headers):
+    task_id = client.post("/api/v1/tasks/", json={"title": "Cached"}, headers=auth_headers).json()["id"]
+    first = client.get(f"/api/v1/tasks/{task_id}", headers=auth_headers)
+    etag = first.headers["ETag"]
+    assert etag.startswith('W/"')
+    assert first.headers["Cache-Control"] == "private, no-cache"
+
+    revalidated = client.get(f"/api/v1/tasks/{task_id}", headers={**auth_headers, "If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["ETag"] == etag
+    assert revalidated.content == b""
+
+    client.put(f"/api/v1/tasks/{task_id}", json={"title": "Changed"}, headers=auth_headers)
+    changed = client.get(f"/api/v1/tasks/{task_id}", headers={**auth_headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["title"] == "Changed"
+    assert changed.headers["ETag"] != etag
+
+
+def test_missing_task_is_404_even_when_revalidating(client, auth_headers):
+    response = client.get("/api/v1/tasks/999999", headers={**auth_headers, "If-None-Match": 'W/"stale"'})
+    assert response.status_code == 404
+
+
+def test_list_revalidates_with_304_until_a_task_changes(client, auth_headers):
+    params = {"limit": 5}
+    etag = client.get("/api/v1/tasks/", params=params, headers=auth_headers).headers["ETag"]
+
+    revalidated = client.get("/api/v1/tasks/", params=params, headers={**auth_headers, "If-None-Match": etag})
+    assert revalidated.status_code == 304
+
+    # Different query parameters are a different representation
+    other = client.get("/api/v1/tasks/", params={"limit": 6}, headers={**auth_headers, "If-None-Match": etag})
+    assert other.status_code == 200
+
+    client.post("/api/v1/tasks/", json={"title": "New"}, headers=auth_headers)
+    changed = client.get("/api/v1/tasks/", params=params, headers={**auth_headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+def test_list_etag_changes_when_a_task_is_deleted(client, auth_headers):
+    task_id = client.post("/api/v1/tasks/", json={"title": "Doomed"}, headers=auth_headers).json()["id"]
+    etag = client.get("/api/v1/tasks/", headers=auth_headers).headers["ETag"]
+
+    client.delete(f"/api/v1/tasks/{task_id}", headers=auth_headers)
+
+    response = client.get("/api/v1/tasks/", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
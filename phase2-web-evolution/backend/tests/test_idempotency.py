@@ -0,0 +1,73 @@
+import uuid
+
+from sqlmodel import Session, func, select
+
+from db import engine
+from idempotency import idempotency_cache
+from models import Task
+
+
+def _task_count() -> int:
+    with Session(engine) as session:
+        return session.exec(select(func.count(Task.id))).one()
+
+
+def test_retry_with_same_key_replays_the_original_response(client, auth_headers):
+    headers = {**auth_headers, "Idempotency-Key": uuid.uuid4().hex}
+    first = client.post("/api/v1/tasks/", json={"title": "Once"}, headers=headers)
+    count = _task_count()
+
+    retry = client.post("/api/v1/tasks/", json={"title": "Once"}, headers=headers)
+
+    assert retry.status_code == 200
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert _task_count() == count
+
+
+def test_replay_survives_a_cold_cache(client, auth_headers):
+    headers = {**auth_headers, "Idempotency-Key": uuid.uuid4().hex}
+    first = client.post("/api/v1/tasks/", json={"title": "Stored"}, headers=headers).json()
+    idempotency_cache.clear()
+
+    retry = client.post("/api/v1/tasks/", json={"title": "Stored"}, headers=headers)
+
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json()["id"] == first["id"]
+
+
+def test_same_key_with_a_different_body_is_422(client, auth_headers):
+    headers = {**auth_headers, "Idempotency-Key": uuid.uuid4().hex}
+    client.post("/api/v1/tasks/", json={"title": "Original"}, headers=headers)
+    count = _task_count()
+
+    response = client.post("/api/v1/tasks/", json={"title": "Different"}, headers=headers)
+
+    assert response.status_code == 422
+    assert _task_count() == count
+
+
+def test_keys_are_scoped_per_user(client, auth_headers):
+    key = uuid.uuid4().hex
+    mine = client.post("/api/v1/tasks/", json={"title": "Mine"}, headers={**auth_headers, "Idempotency-Key": key})
+
+    name = uuid.uuid4().hex[:12]
+    other_token = client.post("/api/v1/auth/register", json={
+        "email": f"{name}@example.com", "username": name, "password": "correct horse battery"
+    }).json()["tokens"]["access_token"]
+    theirs = client.post(
+        "/api/v1/tasks/", json={"title": "Mine"},
+        headers={"Authorization": f"Bearer {other_token}", "Idempotency-Key": key}
+    )
+
+    assert theirs.status_code == 200
+    assert "Idempotent-Replayed" not in theirs.headers
+    assert theirs.json()["id"] != mine.json()["id"]
+
+
+def test_invalid_key_is_400(client, auth_headers):
+    response = client.post(
+        "/api/v1/tasks/", json={"title": "Bad key"}, headers={**auth_headers, "Idempotency-Key": "x" * 256}
+    )
+    assert response.status_code == 400
@@ -0,0 +1,42 @@
+import json
+import logging
+import queue
+
+from logging_config import DeferredQueueHandler, JsonFormatter
+
+
+def _queued_record(log):
+    log_queue = queue.SimpleQueue()
+    logger = logging.getLogger("tests.logging_config")
+    logger.propagate = False
+    handler = DeferredQueueHandler(log_queue)
+    logger.addHandler(handler)
+    try:
+        log(logger)
+    finally:
+        logger.removeHandler(handler)
+    return log_queue.get_nowait()
+
+
+def test_exception_is_its_own_json_field():
+    def log(logger):
+        try:
+            raise RuntimeError("kaput")
+        except RuntimeError:
+            logger.exception("boom %s", 42, extra={"task_id": 7})
+
+    record = _queued_record(log)
+    # Nothing formatted on the logging thread
+    assert record.exc_text is None
+
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["message"] == "boom 42"
+    assert entry["task_id"] == 7
+    assert entry["exc_info"].startswith("Traceback")
+    assert "RuntimeError: kaput" in entry["exc_info"]
+
+
+def test_record_without_exception_has_no_exc_info():
+    entry = json.loads(JsonFormatter().format(_queued_record(lambda logger: logger.warning("plain"))))
+    assert entry["message"] == "plain"
+    assert "exc_info" not in entry
@@ -0,0 +1,42 @@
+import uuid
+
+import pytest
+
+import rate_limit
+
+
+@pytest.fixture
+def limited(monkeypatch):
+    """Rate limiting on, with buckets keyed by a client IP unique to the test"""
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_TRUST_FORWARDED", True)
+    return {"X-Forwarded-For": f"10.0.{uuid.uuid4().int % 250}.{uuid.uuid4().int % 250}"}
+
+
+def test_empty_bucket_returns_429_with_retry_after(client, limited, monkeypatch):
+    # Two requests of burst, then one token per 100 seconds
+    monkeypatch.setattr(rate_limit, "IP_BUCKET", (0.01, 2))
+
+    first = client.get("/docs", headers=limited)
+    second = client.get("/docs", headers=limited)
+    rejected = client.get("/docs", headers=limited)
+
+    assert first.status_code == second.status_code == 200
+    assert first.headers["X-RateLimit-Limit"] == "2"
+    assert first.headers["X-RateLimit-Remaining"] == "1"
+    assert rejected.status_code == 429
+    assert rejected.json() == {"detail": "Too many requests"}
+    assert 90 <= int(rejected.headers["Retry-After"]) <= 100
+
+
+def test_user_bucket_rejection_leaves_ip_bucket_alone(client, limited, auth_headers, monkeypatch):
+    monkeypatch.setattr(rate_limit, "IP_BUCKET", (0.01, 3))
+    monkeypatch.setattr(rate_limit, "USER_BUCKET", (0.01, 1))
+    headers = {**limited, **auth_headers}
+
+    assert client.get("/api/v1/tasks/", headers=headers).status_code == 200
+    # The user's bucket is empty; retries must not spend the IP's tokens
+    assert [client.get("/api/v1/tasks/", headers=headers).status_code for _ in range(5)] == [429] * 5
+
+    anonymous = [client.get("/docs", headers=limited).status_code for _ in range(3)]
+    assert anonymous == [200, 200, 429]
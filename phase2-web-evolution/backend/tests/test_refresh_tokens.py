@@ -0,0 +1,59 @@
+import uuid
+
+import jwt
+
+from auth_utils import ALGORITHM, SECRET_KEY
+
+
+def _register(client) -> dict:
+    name = uuid.uuid4().hex[:12]
+    response = client.post("/api/v1/auth/register", json={
+        "email": f"{name}@example.com", "username": name, "password": "correct horse battery"
+    })
+    return response.json()["tokens"]
+
+
+def _refresh(client, refresh_token):
+    return client.post("/api/v1/auth/refresh", json={"refresh_token": refresh_token})
+
+
+def test_refresh_rotates_the_token(client):
+    issued = _register(client)
+
+    rotated = _refresh(client, issued["refresh_token"])
+
+    assert rotated.status_code == 200
+    assert rotated.json()["refresh_token"] != issued["refresh_token"]
+    assert _refresh(client, rotated.json()["refresh_token"]).status_code == 200
+
+
+def test_reusing_a_rotated_token_revokes_the_whole_family(client):
+    issued = _register(client)
+    rotated = _refresh(client, issued["refresh_token"]).json()
+
+    # The old token was replayed: treat it as stolen
+    replayed = _refresh(client, issued["refresh_token"])
+
+    assert replayed.status_code == 401
+    # Including the token the legitimate client rotated to
+    assert _refresh(client, rotated["refresh_token"]).status_code == 401
+
+
+def test_logout_revokes_the_refresh_token(client):
+    issued = _register(client)
+
+    assert client.post("/api/v1/auth/logout", json={"refresh_token": issued["refresh_token"]}).status_code == 200
+
+    assert _refresh(client, issued["refresh_token"]).status_code == 401
+
+
+def test_untracked_refresh_token_is_rejected(client):
+    # Validly signed, but never issued by the server
+    user_id = jwt.decode(_register(client)["access_token"], SECRET_KEY, algorithms=[ALGORITHM])["sub"]
+    forged = jwt.encode({"sub": user_id, "jti": uuid.uuid4().hex, "type": "refresh"}, SECRET_KEY, algorithm=ALGORITHM)
+
+    assert _refresh(client, forged).status_code == 401
+
+
+def test_access_token_cannot_be_used_to_refresh(client):
+    assert _refresh(client, _register(client)["access_token"]).status_code == 400
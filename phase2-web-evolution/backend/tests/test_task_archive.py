@@ -0,0 +1,122 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+from sqlmodel import Session, select
+
+from db import engine
+from models import ArchivedTask, Task
+from task_archive import archive_completed_tasks
+
+
+def _archived_task(client, headers, title="Old task") -> int:
+    """Create a task, complete it long ago and run the archival job"""
+    task_id = client.post("/api/v1/tasks/", json={"title": title}, headers=headers).json()["id"]
+    client.patch(f"/api/v1/tasks/{task_id}/complete", headers=headers)
+    with Session(engine) as session:
+        session.execute(
+            update(Task).where(Task.id == task_id).values(completed_at=datetime.utcnow() - timedelta(days=365))
+        )
+        session.commit()
+    archive_completed_tasks()
+    with Session(engine) as session:
+        assert session.get(ArchivedTask, task_id) is not None
+    return task_id
+
+
+def _location(task_id) -> str:
+    with Session(engine) as session:
+        if session.exec(select(Task.id).where(Task.id == task_id)).first():
+            return "active"
+        if session.exec(select(ArchivedTask.id).where(ArchivedTask.id == task_id)).first():
+            return "archived"
+    return "gone"
+
+
+def test_new_task_never_takes_an_archived_id(client, auth_headers):
+    # The archived task is the newest, and the only other recent one is deleted
+    kept_id = client.post("/api/v1/tasks/", json={"title": "Kept"}, headers=auth_headers).json()["id"]
+    archived_id = _archived_task(client, auth_headers)
+    client.delete(f"/api/v1/tasks/{kept_id}", headers=auth_headers)
+
+    new_id = client.post("/api/v1/tasks/", json={"title": "New"}, headers=auth_headers).json()["id"]
+
+    assert new_id > archived_id
+    assert client.get(f"/api/v1/tasks/{archived_id}", headers=auth_headers).json()["title"] == "Old task"
+
+
+def test_delete_archived_task(client, auth_headers):
+    task_id = _archived_task(client, auth_headers)
+    cursor = client.get("/api/v1/tasks/changes", headers=auth_headers).json()["cursor"]
+
+    response = client.delete(f"/api/v1/tasks/{task_id}", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert _location(task_id) == "gone"
+    assert client.get(f"/api/v1/tasks/{task_id}", headers=auth_headers).status_code == 404
+    changes = client.get("/api/v1/tasks/changes", params={"since": cursor}, headers=auth_headers).json()
+    assert task_id in changes["deleted"]
+
+
+def test_batch_delete_archived_task(client, auth_headers):
+    archived_id = _archived_task(client, auth_headers)
+    active_id = client.post("/api/v1/tasks/", json={"title": "Active"}, headers=auth_headers).json()["id"]
+    missing_id = active_id + 1000
+
+    response = client.request(
+        "DELETE", "/api/v1/tasks/batch", json={"ids": [archived_id, active_id, missing_id]}, headers=auth_headers
+    ).json()
+
+    assert response["deleted"] == sorted([archived_id, active_id])
+    assert [error["id"] for error in response["errors"]] == [missing_id]
+    assert _location(archived_id) == _location(active_id) == "gone"
+
+
+def test_update_archived_task_restores_it(client, auth_headers):
+    task_id = _archived_task(client, auth_headers)
+
+    response = client.put(f"/api/v1/tasks/{task_id}", json={"status": "pending"}, headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.json()["id"] == task_id
+    assert response.json()["status"] == "pending"
+    assert _location(task_id) == "active"
+    listed = client.get("/api/v1/tasks/", params={"limit": 50}, headers=auth_headers).json()["tasks"]
+    assert task_id in [task["id"] for task in listed]
+
+
+def test_complete_archived_task_restores_it(client, auth_headers):
+    task_id = _archived_task(client, auth_headers)
+
+    response = client.patch(f"/api/v1/tasks/{task_id}/complete", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "completed"
+    assert _location(task_id) == "active"
+
+
+def test_batch_update_archived_task_restores_it(client, auth_headers):
+    task_id = _archived_task(client, auth_headers)
+
+    response = client.patch(
+        "/api/v1/tasks/batch", json={"tasks": [{"id": task_id, "title": "Renamed"}]}, headers=auth_headers
+    ).json()
+
+    assert response["errors"] == []
+    assert [(task["id"], task["title"], task["status"]) for task in response["tasks"]] == [
+        (task_id, "Renamed", "completed")
+    ]
+    assert _location(task_id) == "active"
+
+
+def test_rejected_batch_item_leaves_archived_task_archived(client, auth_headers):
+    archived_id = _archived_task(client, auth_headers)
+    active_id = client.post("/api/v1/tasks/", json={"title": "Active"}, headers=auth_headers).json()["id"]
+
+    response = client.patch("/api/v1/tasks/batch", json={"tasks": [
+        {"id": archived_id, "status": "nope"},
+        {"id": active_id, "title": "Renamed"},
+    ]}, headers=auth_headers).json()
+
+    assert [error["index"] for error in response["errors"]] == [0]
+    assert [task["id"] for task in response["tasks"]] == [active_id]
+    assert _location(archived_id) == "archived"
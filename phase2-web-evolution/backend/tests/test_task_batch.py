@@ -0,0 +1,27 @@
+def test_batch_create_returns_tasks_with_request_index(client, auth_headers):
+    response = client.post("/api/v1/tasks/batch", json={"tasks": [
+        {"title": "First"},
+        {"title": "Bad", "priority": "nope"},
+        {"title": "Third"},
+    ]}, headers=auth_headers).json()
+
+    assert [(task["index"], task["title"]) for task in response["tasks"]] == [(0, "First"), (2, "Third")]
+    assert [error["index"] for error in response["errors"]] == [1]
+
+
+def test_batch_update_keeps_request_order(client, auth_headers):
+    created = client.post("/api/v1/tasks/batch", json={"tasks": [
+        {"title": "Low id"}, {"title": "High id"}
+    ]}, headers=auth_headers).json()["tasks"]
+    low_id, high_id = (task["id"] for task in created)
+
+    response = client.patch("/api/v1/tasks/batch", json={"tasks": [
+        {"id": high_id, "title": "High renamed"},
+        {"id": low_id, "status": "nope"},
+        {"id": low_id, "title": "Low renamed"},
+    ]}, headers=auth_headers).json()
+
+    assert [(task["index"], task["id"], task["title"]) for task in response["tasks"]] == [
+        (0, high_id, "High renamed"), (2, low_id, "Low renamed")
+    ]
+    assert [error["index"] for error in response["errors"]] == [1]
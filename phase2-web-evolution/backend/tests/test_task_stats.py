@@ -0,0 +1,32 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+from sqlmodel import Session
+
+from db import engine
+from models import Task
+from task_archive import archive_completed_tasks
+
+
+def _without_timestamp(stats: dict) -> dict:
+    return {key: value for key, value in stats.items() if key != "generated_at"}
+
+
+def test_archiving_leaves_stats_unchanged(client, auth_headers):
+    client.post("/api/v1/tasks/", json={"title": "Open", "priority": "high"}, headers=auth_headers)
+    task_id = client.post("/api/v1/tasks/", json={"title": "Done"}, headers=auth_headers).json()["id"]
+    client.patch(f"/api/v1/tasks/{task_id}/complete", headers=auth_headers)
+    with Session(engine) as session:
+        session.execute(
+            update(Task).where(Task.id == task_id).values(completed_at=datetime.utcnow() - timedelta(days=365))
+        )
+        session.commit()
+    before = client.get("/api/v1/tasks/stats", headers=auth_headers).json()
+
+    assert archive_completed_tasks() >= 1
+
+    after = client.get("/api/v1/tasks/stats", headers=auth_headers).json()
+    assert after["total"] == 2
+    assert after["by_status"]["completed"] == 1
+    assert after["completion_hours"]["mean"] is not None
+    assert _without_timestamp(after) == _without_timestamp(before)
@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import task_sync
+from task_sync import Position, SyncCursor
+
+
+@pytest.fixture(autouse=True)
+def settled_immediately(monkeypatch):
+    # Let cursors move up to "now" instead of lagging a couple of seconds behind
+    monkeypatch.setattr(task_sync, "SYNC_SETTLE", timedelta(0))
+
+
+def _changes(client, headers, since=None, **params):
+    if since is not None:
+        params["since"] = since
+    response = client.get("/api/v1/tasks/changes", params=params, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_cursor_returns_updates_and_tombstones_since_last_sync(client, auth_headers):
+    kept = client.post("/api/v1/tasks/", json={"title": "Kept"}, headers=auth_headers).json()["id"]
+    doomed = client.post("/api/v1/tasks/", json={"title": "Doomed"}, headers=auth_headers).json()["id"]
+    full = _changes(client, auth_headers, limit=500)
+    while full["has_more"]:
+        full = _changes(client, auth_headers, full["cursor"], limit=500)
+
+    client.put(f"/api/v1/tasks/{kept}", json={"title": "Kept, renamed"}, headers=auth_headers)
+    client.delete(f"/api/v1/tasks/{doomed}", headers=auth_headers)
+    delta = _changes(client, auth_headers, full["cursor"])
+
+    assert [(task["id"], task["title"]) for task in delta["tasks"]] == [(kept, "Kept, renamed")]
+    assert delta["deleted"] == [doomed]
+    assert delta["has_more"] is False
+
+    # Nothing changed since, so the next sync is empty
+    idle = _changes(client, auth_headers, delta["cursor"])
+    assert idle["tasks"] == [] and idle["deleted"] == []
+
+
+def test_changes_are_paged_in_order(client, auth_headers):
+    start = _changes(client, auth_headers)
+    while start["has_more"]:
+        start = _changes(client, auth_headers, start["cursor"])
+    created = [
+        client.post("/api/v1/tasks/", json={"title": f"Page {i}"}, headers=auth_headers).json()["id"]
+        for i in range(3)
+    ]
+
+    first = _changes(client, auth_headers, start["cursor"], limit=2)
+    second = _changes(client, auth_headers, first["cursor"], limit=2)
+
+    assert first["has_more"] is True
+    assert [task["id"] for task in first["tasks"] + second["tasks"]] == created
+    assert second["has_more"] is False
+
+
+def test_expired_cursor_is_410(client, auth_headers):
+    stale = SyncCursor(
+        Position(datetime.min, 0),
+        Position(datetime.utcnow() - task_sync.TASK_TOMBSTONE_RETENTION - timedelta(days=1), 0)
+    ).encode()
+
+    response = client.get("/api/v1/tasks/changes", params={"since": stale}, headers=auth_headers)
+
+    assert response.status_code == 410
+
+
+def test_malformed_cursor_is_400(client, auth_headers):
+    response = client.get("/api/v1/tasks/changes", params={"since": "not-a-cursor"}, headers=auth_headers)
+    assert response.status_code == 400
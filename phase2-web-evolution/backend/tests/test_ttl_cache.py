@@ -0,0 +1,43 @@
+import time
+
+from ttl_cache import TTLCache
+from user_cache import CachedUser, UserCache
+
+
+def _user(user_id, email, username):
+    return CachedUser(user_id, email, username, "hash", None, True, False)
+
+
+def test_lru_eviction_and_stats():
+    cache = TTLCache(2, 60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert cache.stats() == {"size": 2, "max_size": 2, "hits": 2, "misses": 1, "hit_ratio": 2 / 3}
+
+
+def test_entries_expire_at_the_earlier_of_ttl_and_expiry():
+    cache = TTLCache(10, 60)
+    cache.put("expired", 1, expires_at=time.time() - 1)
+    cache.put("capped", 2, expires_at=time.time() + 3600)
+
+    assert cache.get("expired") is None
+    assert cache._entries["capped"][1] <= time.time() + 60
+
+
+def test_user_cache_indexes_follow_entries():
+    cache = UserCache(1, 60)
+    cache.put(_user(1, "a@example.com", "a"))
+    assert cache.update(1, email="b@example.com").email == "b@example.com"
+    assert cache.get_by_email("a@example.com") is None
+    assert cache.get_by_email("b@example.com").id == 1
+
+    # Evicting the only entry drops its index entries too
+    cache.put(_user(2, "c@example.com", "c"))
+    assert cache.get_by_username("a") is None
+    assert cache._by_email == {"c@example.com": 2}
+    assert cache.update(1, email="d@example.com") is None
@@ -0,0 +1,198 @@
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+from dotenv import load_dotenv
+from sqlmodel import Session, select
+from sqlalchemy import update, delete
+from models import RefreshToken
+from db import engine
+from background import register_job
+from redis_client import get_redis
+from logging_config import get_logger
+
+# Load environment variables
+load_dotenv()
+
+logger = get_logger(__name__)
+
+# "local" keeps revocation state in process; "redis" shares it across workers
+TOKEN_STORE_BACKEND = os.getenv("TOKEN_STORE_BACKEND", "local").lower()
+# How long the local backend trusts a cached "still active" answer before re-checking the DB.
+# Bounds how long a token revoked on another worker can still be used there.
+TOKEN_ACTIVE_CACHE_TTL = float(os.getenv("TOKEN_ACTIVE_CACHE_TTL", "30"))
+TOKEN_SWEEP_INTERVAL = float(os.getenv("TOKEN_SWEEP_INTERVAL", "3600"))
+
+
+class LocalRevocationBackend:
+    """
+    In-process jti state cache. Revoked entries are kept until the token
+    would have expired anyway; active entries only for TOKEN_ACTIVE_CACHE_TTL,
+    since another worker may revoke them.
+    """
+
+    authoritative = False
+
+    def __init__(self, active_ttl: float):
+        self.active_ttl = active_ttl
+        self._entries = {}  # jti -> (revoked, valid_until)
+        self._lock = threading.Lock()
+
+    def is_revoked(self, jti: str) -> Optional[bool]:
+        """True/False if known, None if the caller must ask the database"""
+        with self._lock:
+            entry = self._entries.get(jti)
+            if entry is None:
+                return None
+            revoked, valid_until = entry
+            if valid_until <= time.time():
+                del self._entries[jti]
+                return None
+            return revoked
+
+    def mark_active(self, jti: str, expires_at: float):
+        with self._lock:
+            self._entries[jti] = (False, min(expires_at, time.time() + self.active_ttl))
+
+    def issue(self, jti: str, expires_at: float):
+        self.mark_active(jti, expires_at)
+
+    def revoke(self, jti: str, expires_at: float):
+        with self._lock:
+            self._entries[jti] = (True, expires_at)
+
+    def prune(self) -> int:
+        now = time.time()
+        with self._lock:
+            stale = [jti for jti, (_, valid_until) in self._entries.items() if valid_until <= now]
+            for jti in stale:
+                del self._entries[jti]
+        return len(stale)
+
+
+class RedisRevocationBackend:
+    """
+    Shared index of active tokens in Redis (or any server speaking the Redis
+    protocol). Every issued token is written here and removed when revoked,
+    so a missing key means the token is not active (never issued, revoked,
+    expired, or lost from Redis) and the database is never consulted on the
+    hot path. Keys expire with the token, so Redis prunes itself.
+    """
+
+    authoritative = True
+
+    def __init__(self, client):
+        self._client = client
+
+    @staticmethod
+    def _key(jti: str) -> str:
+        return f"p2:active:{jti}"
+
+    def is_revoked(self, jti: str) -> Optional[bool]:
+        return not self._client.exists(self._key(jti))
+
+    def mark_active(self, jti: str, expires_at: float):
+        pass
+
+    def issue(self, jti: str, expires_at: float):
+        self._client.set(self._key(jti), 1, exat=max(int(expires_at), int(time.time()) + 1))
+
+    def revoke(self, jti: str, expires_at: float):
+        self._client.delete(self._key(jti))
+
+    def prune(self) -> int:
+        return 0
+
+
+def _create_backend():
+    if TOKEN_STORE_BACKEND == "redis":
+        return RedisRevocationBackend(get_redis())
+    return LocalRevocationBackend(TOKEN_ACTIVE_CACHE_TTL)
+
+
+class TokenStore:
+    """
+    Tracks issued refresh tokens by jti. The database table is the durable
+    record; the backend answers "is this jti revoked?" in O(1) for hot paths.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def issue(self, session: Session, jti: str, user_id: int, expires_at: datetime):
+        """
+        Record a newly issued refresh token; committed by the caller. The
+        backend learns of it first, so a token is never handed out unknown
+        to an authoritative backend.
+        """
+        session.add(RefreshToken(jti=jti, user_id=user_id, expires_at=expires_at))
+        self.backend.issue(jti, _timestamp(expires_at))
+
+    def is_active(self, session: Session, jti: str) -> bool:
+        revoked = self.backend.is_revoked(jti)
+        if revoked is not None and (self.backend.authoritative or revoked):
+            return not revoked
+
+        row = session.exec(
+            select(RefreshToken.revoked_at, RefreshToken.expires_at).where(RefreshToken.jti == jti)
+        ).first()
+        if row is None:
+            # Unknown jti: issued before tokens were tracked, or forged with a leaked key
+            return False
+
+        revoked_at, expires_at = row
+        expires_ts = _timestamp(expires_at)
+        if revoked_at is not None:
+            self.backend.revoke(jti, expires_ts)
+            return False
+        self.backend.mark_active(jti, expires_ts)
+        return True
+
+    def revoke(self, session: Session, jti: str) -> bool:
+        """
+        Revoke a token. Returns False if it was unknown or already revoked,
+        which on rotation means the refresh token is being reused.
+        """
+        expires_at = session.execute(
+            update(RefreshToken)
+            .where(RefreshToken.jti == jti, RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=datetime.utcnow())
+            .returning(RefreshToken.expires_at)
+        ).scalar_one_or_none()
+        if expires_at is None:
+            return False
+        self.backend.revoke(jti, _timestamp(expires_at))
+        return True
+
+    def revoke_all_for_user(self, session: Session, user_id) -> int:
+        rows = session.execute(
+            update(RefreshToken)
+            .where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=datetime.utcnow())
+            .returning(RefreshToken.jti, RefreshToken.expires_at)
+        ).all()
+        for jti, expires_at in rows:
+            self.backend.revoke(jti, _timestamp(expires_at))
+        return len(rows)
+
+    def prune_expired(self) -> int:
+        """Delete expired tokens from the table and the local cache"""
+        with Session(engine) as session:
+            deleted = session.execute(
+                delete(RefreshToken).where(RefreshToken.expires_at < datetime.utcnow())
+            ).rowcount
+            session.commit()
+        pruned = self.backend.prune()
+        logger.info("Pruned expired refresh tokens", extra={"deleted": deleted, "cache_pruned": pruned})
+        return deleted
+
+
+def _timestamp(value: datetime) -> float:
+    # Stored datetimes are naive UTC
+    return (value - datetime(1970, 1, 1)).total_seconds()
+
+
+token_store = TokenStore(_create_backend())
+
+register_job("prune_refresh_tokens", TOKEN_SWEEP_INTERVAL, token_store.prune_expired)
@@ -0,0 +1,87 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire `ttl` seconds after they are
+    stored, or earlier if put() is given an expiry. Counts hits and misses
+    for the metrics endpoints.
+
+    Subclasses that keep extra state per entry override _removed(), and may
+    call the unlocked _get/_put/_remove helpers while holding `_lock`.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            return self._get_counted(key)
+
+    def put(self, key: Hashable, value: Any, expires_at: Optional[float] = None):
+        """Cache `value` until `expires_at` (wall clock), but at most `ttl` seconds"""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._put(key, value, expires_at)
+
+    def pop(self, key: Hashable):
+        with self._lock:
+            self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0
+        }
+
+    def _get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.time():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _get_counted(self, key: Hashable) -> Optional[Any]:
+        value = self._get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def _put(self, key: Hashable, value: Any, expires_at: Optional[float] = None):
+        limit = time.time() + self.ttl
+        self._remove(key)
+        self._entries[key] = (value, limit if expires_at is None else min(expires_at, limit))
+        while len(self._entries) > self.maxsize:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._removed(key, entry[0])
+
+    def _removed(self, key: Hashable, value: Any):
+        """Called under the lock whenever an entry leaves the cache"""
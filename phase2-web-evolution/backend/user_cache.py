@@ -0,0 +1,102 @@
+import os
+from dataclasses import dataclass, replace
+from typing import Optional
+from dotenv import load_dotenv
+from models import User
+from ttl_cache import TTLCache
+
+# Load environment variables
+load_dotenv()
+
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+# Entries are refreshed from the database at least this often, which bounds
+# staleness for changes made by other workers
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    """
+    Immutable snapshot of a user row, safe to share between requests
+    """
+    id: int
+    email: str
+    username: str
+    password_hash: str
+    full_name: Optional[str]
+    is_active: bool
+    is_verified: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "CachedUser":
+        return cls(
+            id=user.id,
+            email=user.email,
+            username=user.username,
+            password_hash=user.password_hash,
+            full_name=user.full_name,
+            is_active=user.is_active,
+            is_verified=user.is_verified
+        )
+
+
+class UserCache(TTLCache):
+    """
+    LRU + TTL cache of user snapshots addressable by id, email or username.
+    Writers must call put() or invalidate() after changing a user.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        super().__init__(maxsize, ttl)
+        self._by_email = {}
+        self._by_username = {}
+
+    def _lookup(self, index: dict, key) -> Optional[CachedUser]:
+        """Find a user through the email or username index"""
+        with self._lock:
+            return self._get_counted(index.get(key))
+
+    def get_by_id(self, user_id: int) -> Optional[CachedUser]:
+        return self.get(user_id)
+
+    def get_by_email(self, email: str) -> Optional[CachedUser]:
+        return self._lookup(self._by_email, email)
+
+    def get_by_username(self, username: str) -> Optional[CachedUser]:
+        return self._lookup(self._by_username, username)
+
+    def put(self, user) -> Optional[CachedUser]:
+        """Cache a User row or CachedUser snapshot and return the snapshot"""
+        snapshot = user if isinstance(user, CachedUser) else CachedUser.from_user(user)
+        super().put(snapshot.id, snapshot)
+        return snapshot
+
+    def update(self, user_id: int, **changes) -> Optional[CachedUser]:
+        """
+        Write-through for a partial change. Returns None and caches nothing
+        if the user isn't cached, since a partial change can't build a full snapshot.
+        """
+        with self._lock:
+            current = self._get(user_id)
+            if current is None:
+                return None
+            snapshot = replace(current, **changes)
+            self._put(user_id, snapshot)
+        return snapshot
+
+    def invalidate(self, user_id: int):
+        self.pop(user_id)
+
+    def _put(self, user_id, snapshot: CachedUser, expires_at=None):
+        super()._put(user_id, snapshot, expires_at)
+        self._by_email[snapshot.email] = user_id
+        self._by_username[snapshot.username] = user_id
+
+    def _removed(self, user_id, user: CachedUser):
+        if self._by_email.get(user.email) == user_id:
+            del self._by_email[user.email]
+        if self._by_username.get(user.username) == user_id:
+            del self._by_username[user.username]
+
+
+user_cache = UserCache(USER_CACHE_SIZE, USER_CACHE_TTL)
@@ -4,6 +4,7 @@ import json
 import re
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
+from metrics import track_ai_call
 
 load_dotenv()
 
@@ -55,11 +56,12 @@ def extract_tasks_from_text(text: str):
                 Return ONLY valid JSON in format: [{{"title": "...", "description": "...", "category": "...", "priority": "...", "deadline": "YYYY-MM-DD"}}].
                 If no tasks found at all, return []"""
 
-                response = co.chat(
-                    message=prompt,
-                    model='command-r-plus',
-                    temperature=0.1
-                )
+                with track_ai_call("extract_tasks"):
+                    response = co.chat(
+                        message=prompt,
+                        model='command-r-plus',
+                        temperature=0.1
+                    )
 
                 raw_text = response.text.strip()
                 # JSON dhoondne ke liye regex
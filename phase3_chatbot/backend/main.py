@@ -1,13 +1,15 @@
 import os
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy import create_engine, Column, Integer, String, ForeignKey
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from passlib.context import CryptContext
-from jose import jwt
+from jose import JWTError, jwt
 from datetime import datetime, timedelta
 import cohere
+from rate_limit import chat_rate_limiter
+from metrics import MetricsMiddleware, instrument_engine, metrics_response, track_ai_call
 
 # --- CONFIGURATION ---
 DATABASE_URL = os.getenv("DATABASE_URL")
@@ -22,6 +24,7 @@ engine = create_engine(
     connect_args={"sslmode": "require"},
     pool_pre_ping=True
 )
+instrument_engine(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 co = cohere.Client(COHERE_API_KEY)
@@ -59,6 +62,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Outermost, so request timings include CORS
+app.add_middleware(MetricsMiddleware)
 
 def get_db():
     db = SessionLocal()
@@ -73,11 +78,27 @@ def create_access_token(data: dict):
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+def bearer_user_id(request: Request):
+    """User id from a valid bearer token, or None for anonymous requests"""
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    user_id = payload.get("id")
+    return str(user_id) if user_id is not None else None
+
 # --- ENDPOINTS ---
 @app.get("/")
 def home():
     return {"status": "VIP Todo AI Backend is Running!"}
 
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    return metrics_response()
+
 @app.post("/signup")
 def signup(user_data: dict, db: Session = Depends(get_db)):
     existing = db.query(User).filter(User.email == user_data['email']).first()
@@ -115,17 +136,18 @@ def login(data: dict, db: Session = Depends(get_db)):
 def get_tasks(db: Session = Depends(get_db)):
     return db.query(Task).all()
 
-@app.post("/chat")
+@app.post("/chat", dependencies=[Depends(chat_rate_limiter(bearer_user_id))])
 def chat(data: dict):
     user_msg = data.get("message", "")
     if not user_msg:
         return {"message": "Say something!"}
     try:
-        response = co.generate(
-            model='command',
-            prompt=f"You are a helpful Todo List Assistant. User says: {user_msg}\nAssistant:",
-            max_tokens=100
-        )
+        with track_ai_call("generate"):
+            response = co.generate(
+                model='command',
+                prompt=f"You are a helpful Todo List Assistant. User says: {user_msg}\nAssistant:",
+                max_tokens=100
+            )
         return {"message": response.generations[0].text.strip()}
     except Exception as e:
         return {"message": f"AI Error: {str(e)}"}
\ No newline at end of file
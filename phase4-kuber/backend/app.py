@@ -10,6 +10,8 @@ import os
 import cohere
 from dotenv import load_dotenv
 from health_check import HealthStatus, get_health_status
+from rate_limit import chat_rate_limit
+from metrics import MetricsMiddleware, instrument_engine, metrics_response, track_ai_call
 
 # 1. Environment variables load karna
 load_dotenv()
@@ -26,6 +28,7 @@ if cohere_api_key:
 # 3. Database setup
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://postgres:postgres@db:5432/todo_app")
 engine = create_engine(DATABASE_URL)
+instrument_engine(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -39,6 +42,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Outermost, so request timings include CORS
+app.add_middleware(MetricsMiddleware)
 
 # 5. Database Model
 class TodoDB(Base):
@@ -105,7 +110,7 @@ def delete_todo(todo_id: int, db: Session = Depends(get_db)):
 
 # --- CHATBOT ENDPOINT (SUPER STABLE VERSION) ---
 
-@app.post("/chat/")
+@app.post("/chat/", dependencies=[Depends(chat_rate_limit)])
 async def chat_with_bot(request_data: dict):
     user_message = request_data.get("message", "Hi")
     
@@ -114,25 +119,32 @@ async def chat_with_bot(request_data: dict):
 
     try:
         # METHOD A: Sabse naya SDK (v5+)
-        response = co.chat(message=user_message, model="command-r-plus")
+        with track_ai_call("chat"):
+            response = co.chat(message=user_message, model="command-r-plus")
         return {"response": response.text}
     
     except Exception as e1:
         try:
             # METHOD B: Purana SDK style (Positional argument)
-            response = co.chat(user_message)
+            with track_ai_call("chat"):
+                response = co.chat(user_message)
             return {"response": response.text}
         
         except Exception as e2:
             try:
                 # METHOD C: Generate style (kuch versions mein generate chalta hai)
-                response = co.generate(prompt=user_message, max_tokens=100)
+                with track_ai_call("generate"):
+                    response = co.generate(prompt=user_message, max_tokens=100)
                 return {"response": response.generations[0].text}
             
             except Exception as e3:
                 # METHOD D: Agar sab fail ho jaye lekin API connect ho rahi ho
                 return {"response": f"AI Error: Humne 3 tareeke try kiye magar Cohere connect nahi ho raha. Detail: {str(e1)}"}
 
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    return metrics_response()
+
 @app.get("/health", response_model=HealthStatus)
 def health_check(db: Session = Depends(get_db)):
     return get_health_status()
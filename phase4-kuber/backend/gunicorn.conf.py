@@ -0,0 +1,68 @@
+"""
+Production server settings, picked up by `gunicorn app:app` from the
+working directory.
+
+The master imports the app once (preload_app), which runs create_all once,
+then forks uvicorn workers that inherit the loaded app instead of each
+importing it and repeating the DDL.
+"""
+import math
+import os
+
+
+def _available_cpus() -> int:
+    """CPUs this process may use, including a container's cgroup CPU quota"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    quota = None
+    try:
+        # cgroup v2: "<quota> <period>" or "max <period>"
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            limit, period = f.read().split()
+            if limit != "max":
+                quota = int(limit) / int(period)
+    except (OSError, ValueError):
+        try:
+            # cgroup v1: quota is -1 when unlimited
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+                limit = int(f.read())
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+                period = int(f.read())
+            if limit > 0:
+                quota = limit / period
+        except (OSError, ValueError):
+            pass
+    if quota is not None:
+        cpus = min(cpus, math.ceil(quota))
+    return max(1, cpus)
+
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+# One async worker per available core (or per CPU of the pod's limit). Each
+# worker has its own connection pool, so keep workers x pool under the
+# database's connection limit.
+workers = int(os.getenv("WEB_CONCURRENCY") or _available_cpus())
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+# Seconds workers get to finish in-flight requests after SIGTERM
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+keepalive = int(os.getenv("KEEPALIVE", "5"))
+
+
+def on_starting(server):
+    from app import engine
+
+    # Don't hand the connection create_all used to forked workers
+    engine.dispose()
+
+
+def post_fork(server, worker):
+    from app import engine
+
+    # Drop any pool state inherited from the master without closing its sockets.
+    # Nothing else needs restarting: the app starts no threads at import, and
+    # fork() only carries over the forking thread.
+    engine.dispose(close=False)
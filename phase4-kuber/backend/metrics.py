@@ -0,0 +1,10 @@
+"""
+Metrics for this app: the families shared by every backend (see
+shared/app_metrics) plus the latency of calls to the AI API
+"""
+from app_metrics import MetricsMiddleware, instrument_engine, metrics_response
+from app_metrics.ai import register_ai_metrics
+
+__all__ = ["MetricsMiddleware", "instrument_engine", "metrics_response", "track_ai_call"]
+
+track_ai_call = register_ai_metrics()
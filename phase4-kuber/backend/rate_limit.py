@@ -0,0 +1,95 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+from fastapi import HTTPException, Request
+
+# /chat calls a slow, paid AI API, so every client IP gets a small token bucket,
+# and so does every signed-in user (users behind one NAT share the IP bucket).
+# Buckets live in process memory, so each replica enforces its own limit.
+CHAT_RATE_LIMIT_RATE = float(os.getenv("CHAT_RATE_LIMIT_RATE", "0.5"))  # requests per second
+CHAT_RATE_LIMIT_BURST = float(os.getenv("CHAT_RATE_LIMIT_BURST", "5"))
+CHAT_USER_RATE_LIMIT_RATE = float(os.getenv("CHAT_USER_RATE_LIMIT_RATE", "0.2"))
+CHAT_USER_RATE_LIMIT_BURST = float(os.getenv("CHAT_USER_RATE_LIMIT_BURST", "5"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "10000"))
+# Only honour X-Forwarded-For behind a proxy that sets it
+RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() in ("1", "true", "yes")
+
+
+class TokenBucketLimiter:
+    """In-memory token buckets keyed by client, bounded by LRU eviction"""
+
+    def __init__(self, rate: float, burst: float, max_keys: int):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    def take(self, key: str):
+        """Spend one token. Returns (allowed, seconds until one refills)"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, 0.0 if allowed else (1 - tokens) / self.rate
+
+    def refund(self, key: str):
+        """Give back a token spent by a request that another bucket rejected"""
+        with self._lock:
+            entry = self._buckets.get(key)
+            if entry is not None:
+                tokens, updated_at = entry
+                self._buckets[key] = (min(self.burst, tokens + 1), updated_at)
+
+
+chat_limiter = TokenBucketLimiter(CHAT_RATE_LIMIT_RATE, CHAT_RATE_LIMIT_BURST, RATE_LIMIT_MAX_KEYS)
+chat_user_limiter = TokenBucketLimiter(CHAT_USER_RATE_LIMIT_RATE, CHAT_USER_RATE_LIMIT_BURST, RATE_LIMIT_MAX_KEYS)
+
+
+def client_ip(request: Request) -> str:
+    if RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def chat_rate_limiter(user_id_of: Optional[Callable[[Request], Optional[str]]] = None):
+    """
+    Build the /chat dependency: 429 with Retry-After once the client IP's
+    bucket, or the user's when `user_id_of` identifies one, is empty.
+    `user_id_of` must only trust verified credentials.
+    """
+    def chat_rate_limit(request: Request):
+        buckets = [(chat_limiter, client_ip(request))]
+        user_id = user_id_of(request) if user_id_of is not None else None
+        if user_id is not None:
+            buckets.append((chat_user_limiter, user_id))
+        spent = []
+        for limiter, key in buckets:
+            allowed, retry_after = limiter.take(key)
+            if not allowed:
+                # A rejected request costs nothing, so retries don't drain the other buckets
+                for earlier, earlier_key in spent:
+                    earlier.refund(earlier_key)
+                raise HTTPException(
+                    status_code=429,
+                    detail="Too many requests",
+                    headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+                )
+            spent.append((limiter, key))
+
+    return chat_rate_limit
+
+
+# Per IP only, for apps without user accounts
+chat_rate_limit = chat_rate_limiter()
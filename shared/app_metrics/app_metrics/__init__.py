@@ -0,0 +1,310 @@
+"""
+Prometheus metrics shared by the backends: metric types, a registry that
+renders the text exposition format, request/SQL instrumentation and the
+/metrics response. Dependency-free apart from Starlette and SQLAlchemy,
+which every backend already uses.
+"""
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, Optional, Sequence, Tuple
+from sqlalchemy import event
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Default latency buckets in seconds (upper bounds), roughly log-spaced from 1ms to 10s
+DEFAULT_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+# Requests to these paths aren't instrumented, so scrapes don't measure themselves
+METRICS_EXCLUDED_PATHS = tuple(
+    path.strip() for path in os.getenv("METRICS_EXCLUDED_PATHS", "/metrics").split(",") if path.strip()
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """
+    Thread-safe cumulative histogram with fixed bucket upper bounds
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> dict:
+        """
+        Return cumulative bucket counts keyed by upper bound, plus sum and count
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total_sum = self._sum
+            total_count = self._count
+
+        cumulative = {}
+        running = 0
+        for bound, count in zip(self.buckets, counts):
+            running += count
+            cumulative[str(bound)] = running
+        cumulative["+Inf"] = running + counts[-1]
+
+        return {"buckets": cumulative, "sum": total_sum, "count": total_count}
+
+
+class Counter:
+    """
+    Thread-safe monotonically increasing counter
+    """
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class Gauge:
+    """
+    Thread-safe value that can go up and down, or be read from `callback` at
+    scrape time
+    """
+
+    def __init__(self, callback: Optional[Callable[[], float]] = None):
+        self._value = 0.0
+        self._callback = callback
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+    def set(self, value: float):
+        self._value = value
+
+    @property
+    def value(self) -> float:
+        return self._callback() if self._callback else self._value
+
+
+class Labeled:
+    """
+    One metric per combination of label values, created on first use
+    """
+
+    def __init__(self, factory: Callable, labelnames: Sequence[str]):
+        self.labelnames = tuple(labelnames)
+        self.kind = _kind(factory())
+        self._factory = factory
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values) -> object:
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._factory())
+        return child
+
+    def children(self) -> Iterable[Tuple[Dict[str, str], object]]:
+        for key, child in list(self._children.items()):
+            yield dict(zip(self.labelnames, key)), child
+
+
+def _kind(metric) -> str:
+    if isinstance(metric, Labeled):
+        return metric.kind
+    return {Histogram: "histogram", Counter: "counter", Gauge: "gauge"}[type(metric)]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class Registry:
+    """
+    Named metrics rendered together in the Prometheus text format. Values
+    live in this process, so with several workers each one reports its own.
+    """
+
+    def __init__(self):
+        self._metrics = {}  # name -> (help, metric)
+        self._lock = threading.Lock()
+
+    def register(self, name: str, documentation: str, metric):
+        with self._lock:
+            if name in self._metrics:
+                raise ValueError(f"Metric {name} is already registered")
+            self._metrics[name] = (documentation, metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        return self.register(name, documentation, Labeled(Counter, labelnames) if labelnames else Counter())
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+              callback: Optional[Callable[[], float]] = None):
+        metric = Labeled(Gauge, labelnames) if labelnames else Gauge(callback)
+        return self.register(name, documentation, metric)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        metric = Labeled(lambda: Histogram(buckets), labelnames) if labelnames else Histogram(buckets)
+        return self.register(name, documentation, metric)
+
+    def render(self) -> str:
+        lines = []
+        for name, (documentation, metric) in sorted(self._metrics.items()):
+            kind = _kind(metric)
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            children = metric.children() if isinstance(metric, Labeled) else [({}, metric)]
+            for labels, child in children:
+                if kind != "histogram":
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(child.value)}")
+                    continue
+                snapshot = child.snapshot()
+                for bound, count in snapshot["buckets"].items():
+                    lines.append(f"{name}_bucket{_format_labels({**labels, 'le': bound})} {count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(snapshot['sum'])}")
+                lines.append(f"{name}_count{_format_labels(labels)} {snapshot['count']}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# Families every app records; app-specific ones are registered on REGISTRY
+# by the app itself (or by an extension such as app_metrics.ai)
+http_requests = REGISTRY.counter(
+    "http_requests_total", "HTTP requests by route template and status code", ("method", "route", "status")
+)
+http_request_seconds = REGISTRY.histogram(
+    "http_request_duration_seconds", "Time from request start to the last body byte sent", ("method", "route")
+)
+# Not per route: the route is only known once the request has been routed
+http_in_flight = REGISTRY.gauge("http_requests_in_flight", "Requests currently being handled")
+db_queries = REGISTRY.counter("db_queries_total", "SQL statements executed")
+db_query_seconds = REGISTRY.histogram("db_query_duration_seconds", "Time spent in each SQL statement")
+db_queries_per_request = REGISTRY.histogram(
+    "http_request_db_queries", "SQL statements executed per request", ("route",), buckets=QUERY_COUNT_BUCKETS
+)
+db_seconds_per_request = REGISTRY.histogram(
+    "http_request_db_duration_seconds", "Total SQL time per request", ("route",)
+)
+
+# [statements, seconds] for the request being handled, shared with the
+# threadpool because run_in_threadpool copies the context
+_request_db_usage: ContextVar[Optional[list]] = ContextVar("request_db_usage", default=None)
+
+
+def _route_template(scope: Scope) -> str:
+    """Path template of the matched route, so /tasks/1 and /tasks/2 share a series"""
+    route = scope.get("route")
+    path = getattr(route, "path_format", None) or getattr(route, "path", None)
+    # Unmatched paths are collapsed so scanners can't create unbounded series
+    return path or "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Records request count, latency and in-flight requests per route, plus
+    how many SQL statements each request ran and how long they took.
+    Add it last so it wraps every other middleware.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not METRICS_ENABLED or scope["path"] in METRICS_EXCLUDED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        usage = [0, 0.0]
+        token = _request_db_usage.set(usage)
+        http_in_flight.inc()
+        start = time.perf_counter()
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_in_flight.dec()
+            _request_db_usage.reset(token)
+            route = _route_template(scope)
+            http_requests.labels(scope["method"], route, status).inc()
+            http_request_seconds.labels(scope["method"], route).observe(elapsed)
+            db_queries_per_request.labels(route).observe(usage[0])
+            db_seconds_per_request.labels(route).observe(usage[1])
+
+
+def instrument_engine(engine):
+    """Count and time every statement `engine` executes, globally and per request"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["metrics_query_start"].pop()
+        db_queries.inc()
+        db_query_seconds.observe(elapsed)
+        usage = _request_db_usage.get()
+        if usage is not None:
+            usage[0] += 1
+            usage[1] += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def _discard_timer(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("metrics_query_start"):
+            conn.info["metrics_query_start"].pop()
+
+
+def metrics_response() -> Response:
+    """Everything in the registry, for a GET /metrics route"""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,35 @@
+"""
+Latency of calls to external AI APIs, for the backends that make them
+"""
+import time
+from contextlib import contextmanager
+from typing import Callable, ContextManager
+from app_metrics import REGISTRY, Registry
+
+# AI completions take seconds, not milliseconds
+AI_LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+
+def register_ai_metrics(registry: Registry = REGISTRY,
+                        default_provider: str = "cohere") -> Callable[..., ContextManager[None]]:
+    """
+    Register ai_request_duration_seconds and return track_ai_call(operation,
+    provider), which times one call; failures are recorded with
+    outcome="error" and re-raised
+    """
+    ai_call_seconds = registry.histogram(
+        "ai_request_duration_seconds", "Latency of calls to external AI APIs", ("provider", "operation", "outcome"),
+        buckets=AI_LATENCY_BUCKETS
+    )
+
+    @contextmanager
+    def track_ai_call(operation: str, provider: str = default_provider):
+        outcome = "error"
+        start = time.perf_counter()
+        try:
+            yield
+            outcome = "success"
+        finally:
+            ai_call_seconds.labels(provider, operation, outcome).observe(time.perf_counter() - start)
+
+    return track_ai_call